@@ -0,0 +1,73 @@
+"""
+Maintenance commands, run from the project root:
+
+    python -m app.cli backfill-chat-stats [--batch-size 500]
+    python -m app.cli compress-messages [--batch-size 500] [--decompress]
+    python -m app.cli archive-chats [--older-than-days 30] [--batch-size 100]
+"""
+import argparse
+import asyncio
+
+from .config import settings
+from .database import engine
+from .services.chat_archiver import ChatArchiver
+from .services.conversation import backfill_chat_stats, recompress_messages
+
+async def _backfill_chat_stats(args):
+    total = await backfill_chat_stats(args.batch_size)
+    print(f"Done, {total} chats updated")
+
+async def _compress_messages(args):
+    total = await recompress_messages(args.batch_size, args.decompress)
+    print(f"Done, {total} messages rewritten")
+
+async def _archive_chats(args):
+    archiver = ChatArchiver(args.older_than_days, 0, args.batch_size)
+    while await archiver.archive_once():
+        print(f"Archived {archiver.chats_archived} chats")
+    print(f"Done, {archiver.chats_archived} chats ({archiver.messages_archived} messages) archived")
+
+COMMANDS = {
+    "backfill-chat-stats": _backfill_chat_stats,
+    "compress-messages": _compress_messages,
+    "archive-chats": _archive_chats,
+}
+
+async def _run(args):
+    try:
+        await COMMANDS[args.command](args)
+    finally:
+        await engine.dispose()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="TAI maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser(
+        "backfill-chat-stats",
+        help="Recompute message_count, last_message_at and last_message_preview for every chat"
+    )
+    backfill.add_argument("--batch-size", type=int, default=500, help="Chats per transaction")
+
+    compress = commands.add_parser(
+        "compress-messages",
+        help="Store existing message bodies with the current compression settings"
+    )
+    compress.add_argument("--batch-size", type=int, default=500, help="Messages per transaction")
+    compress.add_argument("--decompress", action="store_true", help="Store every body as plain text instead")
+
+    archive = commands.add_parser(
+        "archive-chats",
+        help="Move the messages of idle chats into chat_archives now, without waiting for the background job"
+    )
+    archive.add_argument(
+        "--older-than-days", type=int, default=settings.CHAT_ARCHIVE_AFTER_DAYS,
+        help="Archive chats not updated for this many days"
+    )
+    archive.add_argument("--batch-size", type=int, default=settings.CHAT_ARCHIVE_BATCH_SIZE, help="Chats per batch")
+
+    args = parser.parse_args(argv)
+    asyncio.run(_run(args))
+
+if __name__ == "__main__":
+    main()
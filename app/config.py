@@ -7,26 +7,113 @@ import json
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./tai.db"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Create missing tables at startup instead of running migrations.
+    # Unset means only for SQLite (local development); production runs `alembic upgrade head`.
+    AUTO_CREATE_TABLES: Optional[bool] = None
+    # Deleted chats are hidden at once and purged in the background in batches
+    CHAT_PURGE_INTERVAL_SECONDS: float = 60.0  # 0 disables the purger
+    CHAT_PURGE_BATCH_SIZE: int = 1000  # Messages per DELETE statement
+    # Chats idle this long have their messages moved to the chat_archives table
+    CHAT_ARCHIVE_AFTER_DAYS: int = 30  # 0 disables archiving
+    CHAT_ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+    CHAT_ARCHIVE_BATCH_SIZE: int = 100  # Chats archived per pass
+    # Message bodies at least this many bytes are stored compressed (0 disables)
+    MESSAGE_COMPRESSION_THRESHOLD_BYTES: int = 2048
+    MESSAGE_COMPRESSION_CODEC: str = "zstd"  # 'zstd' (needs the 'zstandard' package) or 'zlib'
     
     # Redis (optional - set to empty string if not available)
     REDIS_URL: str = "redis://localhost:6379"
     
+    # AI response cache
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: str = "memory"  # 'memory' (per worker) or 'redis' (shared across workers)
+    CACHE_MAX_ENTRIES: int = 1000
+    
     # Security
     SECRET_KEY: str = "your-super-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Token -> user cache used by get_current_user
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_BACKEND: str = "memory"  # 'memory' (per worker) or 'redis' (shared, invalidation reaches every worker)
+    AUTH_CACHE_TTL_SECONDS: int = 300  # Never longer than the token itself
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Password hashing, run on a thread pool off the event loop
+    BCRYPT_ROUNDS: int = 12  # Existing hashes are upgraded on the next login when this changes
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # Waiting hash/verify calls beyond the workers before logins get a 503
+    
+    # Rate limiting: token buckets per user (valid bearer token) or client IP,
+    # requests cost tokens by route (see app/middleware/rate_limit.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # 'memory' (per worker) or 'redis' (shared across workers)
+    RATE_LIMIT_USER_CAPACITY: float = 100
+    RATE_LIMIT_USER_REFILL_PER_SECOND: float = 1.0
+    RATE_LIMIT_IP_CAPACITY: float = 30
+    RATE_LIMIT_IP_REFILL_PER_SECOND: float = 0.25
+    RATE_LIMIT_TRUST_PROXY_HEADERS: bool = False  # Key by X-Forwarded-For behind a load balancer
+    
     # AI Provider Configuration
     AI_PROVIDER: str = "ollama"  # 'ollama' or 'digitalocean'
     
     # Ollama (Local LLM)
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "mistral"  # Can be 'llama2', 'mistral', 'codellama', etc.
+    OLLAMA_KEEP_ALIVE: str = "30m"  # How long Ollama keeps the model loaded after a request ("-1" = forever)
+    OLLAMA_WARMUP: bool = True  # Preload the model and system prompt at startup
     
     # DigitalOcean GenAI
     DIGITALOCEAN_API_KEY: str = ""  # Set in .env file
     DIGITALOCEAN_MODEL: str = "meta-llama/llama-3.1-8b-instruct"  # or other available models
     
+    # Conversation context: history tokens sent per request; older turns are
+    # folded into a rolling per-chat summary
+    CONTEXT_TOKEN_BUDGET: int = 2000
+    
+    # Provider HTTP connection pools
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_READ_TIMEOUT_SECONDS: float = 60.0  # Max gap between response chunks
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    OLLAMA_POOL_MAX_CONNECTIONS: int = 10
+    OLLAMA_POOL_MAX_KEEPALIVE: int = 5
+    OLLAMA_FIRST_BYTE_TIMEOUT_SECONDS: float = 120.0  # Non-streaming Ollama answers only after generating
+    DIGITALOCEAN_POOL_MAX_CONNECTIONS: int = 50
+    DIGITALOCEAN_POOL_MAX_KEEPALIVE: int = 20
+    DIGITALOCEAN_FIRST_BYTE_TIMEOUT_SECONDS: float = 60.0
+    DIGITALOCEAN_HTTP2: bool = True  # Needs the 'h2' package (httpx[http2])
+    
+    # Admission control: concurrent upstream calls per provider, with a priority
+    # queue (interactive chat > tools > content generation) in front
+    OLLAMA_MAX_CONCURRENCY: int = 4  # Fixed limit, or the starting point when adaptive
+    DIGITALOCEAN_MAX_CONCURRENCY: int = 32
+    ADAPTIVE_CONCURRENCY_ENABLED: bool = True  # Tune the limits above from observed latency
+    ADAPTIVE_CONCURRENCY_MAX_LIMIT: int = 64
+    ADMISSION_MAX_QUEUE: int = 64  # Waiting calls per provider before new ones are rejected with 503
+    ADMISSION_TIMEOUT_INTERACTIVE_SECONDS: float = 15.0
+    ADMISSION_TIMEOUT_TOOLS_SECONDS: float = 30.0
+    ADMISSION_TIMEOUT_CONTENT_SECONDS: float = 60.0
+    
+    # Provider circuit breakers and health probes
+    CIRCUIT_BREAKER_WINDOW_SECONDS: float = 60.0
+    CIRCUIT_BREAKER_MIN_REQUESTS: int = 5
+    CIRCUIT_BREAKER_ERROR_RATE: float = 0.5
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS: float = 30.0
+    CIRCUIT_BREAKER_SLOW_CALL_RATE: float = 0.8
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = 30.0
+    HEALTH_PROBE_INTERVAL_SECONDS: float = 15.0  # 0 disables background probes
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 5.0
+    
+    # Developer tools: fill each response with one JSON generation call,
+    # falling back to one call per field when the answer can't be parsed
+    TOOLS_STRUCTURED_OUTPUT: bool = True
+    
     # CORS - Simple string list, no complex parsing
     ALLOWED_ORIGINS: str = "*"
     
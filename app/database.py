@@ -1,16 +1,58 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 from .config import settings
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async drivers for the URLs we accept in DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def _async_engine_args(database_url: str):
+    """
+    Translate DATABASE_URL into an async driver URL and engine options.
+    Pool sizing only applies to server databases; SQLite keeps its default pool.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    url = url.set(drivername=ASYNC_DRIVERS.get(backend, url.drivername))
+
+    kwargs = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    connect_args = {}
+    if backend == "postgresql":
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        )
+        # asyncpg spells libpq's ?sslmode=require (Heroku, DigitalOcean) as ssl=
+        sslmode = url.query.get("sslmode")
+        if sslmode:
+            url = url.difference_update_query(["sslmode"])
+            connect_args["ssl"] = sslmode
+    if connect_args:
+        kwargs["connect_args"] = connect_args
+    return url, kwargs
+
+_url, _engine_kwargs = _async_engine_args(settings.DATABASE_URL)
+engine = create_async_engine(_url, **_engine_kwargs)
+if engine.dialect.name == "sqlite":
+    # SQLite ignores ON DELETE CASCADE unless foreign keys are switched on per connection
+    @event.listens_for(engine.sync_engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+AsyncSessionLocal = async_sessionmaker(
+    engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -0,0 +1,245 @@
+import json
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from jose import JWTError, jwt
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional, fall back to per-worker buckets
+    aioredis = None
+
+from ..config import settings
+from ..services.cache import REDIS_RETRY_SECONDS
+
+# What a request costs, by expected LLM work: (method, path pattern, tokens).
+# First match wins; unmatched requests cost DEFAULT_COST, cost 0 is never limited.
+ROUTE_COSTS: List[Tuple[str, "re.Pattern", int]] = [
+    ("*", re.compile(r"^/(health|metrics)?$"), 0),
+    ("POST", re.compile(r"^/api/chat/generate/"), 10),       # Long-form generation
+    ("POST", re.compile(r"^/api/chat/assistant/"), 6),
+    ("POST", re.compile(r"^/api/chat/general(/stream)?$"), 5),
+    ("POST", re.compile(r"^/api/chat/\d+/messages(/stream)?$"), 5),
+    ("POST", re.compile(r"^/api/tools/"), 5),
+    ("POST", re.compile(r"^/api/auth/(token|register)$"), 3),  # bcrypt, and password guessing
+    ("POST", re.compile(r"^/api/chat/import$"), 5),
+    ("GET", re.compile(r"^/api/chat/export$"), 5),
+]
+DEFAULT_COST = 1
+
+# Environment variables that give away a platform routing requests through
+# its own proxy, where the connecting address is the router's, not the client's
+PROXY_PLATFORMS = {"DYNO": "Heroku"}
+
+# Buckets kept per worker by the memory backend
+MAX_MEMORY_BUCKETS = 50000
+
+# Atomic take on a Redis hash {tokens, ts}, using the Redis clock so every
+# worker agrees. Returns {allowed, tokens left (as a string), seconds to wait}.
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens), tostring(wait)}
+"""
+
+def proxy_platform() -> Optional[str]:
+    for variable, platform in PROXY_PLATFORMS.items():
+        if os.environ.get(variable):
+            return platform
+    return None
+
+def route_cost(method: str, path: str) -> int:
+    for rule_method, pattern, cost in ROUTE_COSTS:
+        if rule_method in ("*", method) and pattern.match(path):
+            return cost
+    return DEFAULT_COST
+
+class MemoryBuckets:
+    """Token buckets in this worker's memory, least recently used dropped first"""
+    def __init__(self, max_buckets: int = MAX_MEMORY_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, capacity: float, rate: float, cost: float) -> Tuple[bool, float, float]:
+        """(allowed, tokens left, seconds until `cost` tokens are available)"""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return allowed, tokens, 0.0 if allowed else (cost - tokens) / rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+class RateLimiter:
+    """
+    Token buckets per client: authenticated requests are keyed by the
+    token's user, everything else by client IP, each with its own capacity
+    (burst) and refill rate. With a Redis URL the buckets are shared by all
+    workers; while Redis is unreachable each worker falls back to its own.
+    """
+    def __init__(
+        self,
+        enabled: bool,
+        user_capacity: float,
+        user_refill_per_second: float,
+        ip_capacity: float,
+        ip_refill_per_second: float,
+        trust_proxy_headers: bool = False,
+        redis_url: Optional[str] = None
+    ):
+        self.enabled = enabled
+        self.limits = {
+            "user": (user_capacity, user_refill_per_second),
+            "ip": (ip_capacity, ip_refill_per_second),
+        }
+        self.trust_proxy_headers = trust_proxy_headers
+        self.memory = MemoryBuckets()
+        self.redis_url = redis_url
+        self._redis = None
+        self._take_script = None
+        self._redis_disabled_until = 0.0
+
+        self.allowed = 0
+        self.limited = 0
+        self.redis_errors = 0
+
+    def _get_redis(self):
+        if not self.redis_url or aioredis is None:
+            return None
+        if time.monotonic() < self._redis_disabled_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+            self._take_script = self._redis.register_script(TAKE_SCRIPT)
+        return self._redis
+
+    def _redis_failed(self, error: Exception):
+        print(f"Rate limiter Redis error: {error}")
+        self.redis_errors += 1
+        self._redis_disabled_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def client_key(self, scope) -> Tuple[str, str]:
+        """(kind, key): the token's user if it carries a valid one, else the client IP"""
+        headers = dict(scope.get("headers") or [])
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        if authorization[:7].lower() == "bearer ":
+            try:
+                payload = jwt.decode(authorization[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                if payload.get("sub"):
+                    return "user", f"user:{payload['sub']}"
+            except JWTError:
+                pass
+
+        ip = scope["client"][0] if scope.get("client") else "unknown"
+        if self.trust_proxy_headers:
+            # The last hop was added by our own proxy, earlier ones are client supplied
+            forwarded = headers.get(b"x-forwarded-for", b"").decode("latin-1")
+            hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+            if hops:
+                ip = hops[-1]
+        return "ip", f"ip:{ip}"
+
+    async def take(self, kind: str, key: str, cost: int) -> Tuple[bool, float, float]:
+        capacity, rate = self.limits[kind]
+        # A route can't cost more than a full bucket, or it would never pass
+        cost = min(cost, capacity)
+        if self._get_redis() is not None:
+            try:
+                allowed, tokens, wait = await self._take_script(
+                    keys=[f"tai:ratelimit:{key}"], args=[capacity, rate, cost]
+                )
+                return bool(allowed), float(tokens), float(wait)
+            except Exception as e:
+                self._redis_failed(e)
+        return self.memory.take(key, capacity, rate, cost)
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "backend": "redis" if self.redis_url and aioredis is not None else "memory",
+            "user_limit": dict(zip(("capacity", "refill_per_second"), self.limits["user"])),
+            "ip_limit": dict(zip(("capacity", "refill_per_second"), self.limits["ip"])),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "memory_buckets": len(self.memory),
+            "redis_errors": self.redis_errors,
+        }
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware charging each request its route's cost from the
+    client's bucket; an empty bucket gets 429 with Retry-After. Plain ASGI
+    rather than BaseHTTPMiddleware so streamed responses pass untouched.
+    """
+    def __init__(self, app, limiter: "RateLimiter"):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        cost = route_cost(scope["method"], scope["path"])
+        if cost <= 0:
+            return await self.app(scope, receive, send)
+
+        kind, key = self.limiter.client_key(scope)
+        allowed, _, wait = await self.limiter.take(kind, key, cost)
+        if allowed:
+            self.limiter.allowed += 1
+            return await self.app(scope, receive, send)
+
+        self.limiter.limited += 1
+        body = json.dumps({"detail": "Rate limit exceeded, slow down"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+rate_limiter = RateLimiter(
+    enabled=settings.RATE_LIMIT_ENABLED,
+    user_capacity=settings.RATE_LIMIT_USER_CAPACITY,
+    user_refill_per_second=settings.RATE_LIMIT_USER_REFILL_PER_SECOND,
+    ip_capacity=settings.RATE_LIMIT_IP_CAPACITY,
+    ip_refill_per_second=settings.RATE_LIMIT_IP_REFILL_PER_SECOND,
+    trust_proxy_headers=settings.RATE_LIMIT_TRUST_PROXY_HEADERS,
+    redis_url=settings.REDIS_URL if settings.RATE_LIMIT_BACKEND == "redis" else None
+)
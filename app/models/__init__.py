@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, LargeBinary, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
+from .types import CompressedText
 
 class User(Base):
     __tablename__ = "users"
@@ -15,31 +16,139 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    # Relationships
-    chats = relationship("Chat", back_populates="user")
+    # Relationships. Never loaded implicitly: async sessions can't lazy load,
+    # and queries should say what they load (selectinload/joinedload)
+    chats = relationship("Chat", back_populates="user", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
 
 class Chat(Base):
     __tablename__ = "chats"
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, default="New Chat")
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    # Set when the user deletes the chat; chat_purger removes it later
+    deleted_at = Column(DateTime(timezone=True), index=True)
+    
+    # Set while the chat's messages live in chat_archives (see services/chat_archiver.py)
+    archived_at = Column(DateTime(timezone=True))
+    restored_at = Column(DateTime(timezone=True))
+    
+    # Sidebar columns, kept in step by conversation.add_messages
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime(timezone=True))
+    last_message_preview = Column(String(120))
+    
+    # Rolling summary of the turns that no longer fit the context budget
+    context_summary = Column(Text)
+    summary_message_id = Column(Integer)  # Last message folded into context_summary
     
     # Relationships
-    user = relationship("User", back_populates="chats")
-    messages = relationship("Message", back_populates="chat")
+    user = relationship("User", back_populates="chats", lazy="raise")
+    messages = relationship("Message", back_populates="chat", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
+    
+    # Chat list: a user's chats, most recently updated first
+    __table_args__ = (
+        Index("ix_chats_user_id_updated_at", user_id, updated_at.desc()),
+    )
 
 class Message(Base):
     __tablename__ = "messages"
     
     id = Column(Integer, primary_key=True, index=True)
-    content = Column(Text, nullable=False)
+    content = Column(CompressedText, nullable=False)  # Large bodies stored compressed
     role = Column(String, nullable=False)  # 'user' or 'assistant'
-    chat_id = Column(Integer, ForeignKey("chats.id"))
+    chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"))
     programming_language = Column(String)  # Optional: if message is about specific language
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    chat = relationship("Chat", back_populates="messages")
\ No newline at end of file
+    chat = relationship("Chat", back_populates="messages", lazy="raise")
+    
+    # Chat history: a chat's messages in order
+    __table_args__ = (
+        Index("ix_messages_chat_id_created_at", chat_id, created_at),
+    )
+
+class ChatArchive(Base):
+    """All messages of an idle chat, as one compressed JSON document"""
+    __tablename__ = "chat_archives"
+    
+    chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"), primary_key=True)
+    codec = Column(String, nullable=False)  # utils.compression codec of `payload`
+    payload = Column(LargeBinary, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ArchivedMessage(Base):
+    """
+    An archived message's chat. Its search index entry outlives the
+    messages row and goes when this does (restore or purge).
+    """
+    __tablename__ = "archived_messages"
+    
+    message_id = Column(Integer, primary_key=True, autoincrement=False)
+    chat_id = Column(Integer, ForeignKey("chat_archives.chat_id", ondelete="CASCADE"), nullable=False, index=True)
+
+# Full-text search index tables, written by services/search.py. They are
+# dialect specific so they live outside the ORM; migrations 0007 and 0008
+# create them for migrated databases, these hooks for create_all.
+#
+# On SQLite the FTS5 table is contentless: it keeps the index but no copy of
+# the text, which would double message storage. Deleting rows from one (the
+# triggers below) needs contentless_delete, new in SQLite 3.43; older
+# versions get a table with its own copy instead.
+#
+# Deleting a message drops its entry unless the message is being archived
+# (it has an archived_messages row); archived entries go with that row.
+SQLITE_CONTENTLESS_DELETE = (3, 43, 0)
+
+def _sqlite_contentless_delete(ddl, target, bind, **kw) -> bool:
+    return (bind.dialect.server_version_info or (0,)) >= SQLITE_CONTENTLESS_DELETE
+
+def _sqlite_without_contentless_delete(ddl, target, bind, **kw) -> bool:
+    return not _sqlite_contentless_delete(ddl, target, bind)
+
+SEARCH_INDEX_DDL = {
+    "sqlite": [
+        # (statement, condition) pairs only run when the condition holds
+        ("CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(content, content='', contentless_delete=1)",
+         _sqlite_contentless_delete),
+        ("CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(content)",
+         _sqlite_without_contentless_delete),
+        "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages "
+        "WHEN NOT EXISTS (SELECT 1 FROM archived_messages WHERE message_id = old.id) "
+        "BEGIN DELETE FROM messages_fts WHERE rowid = old.id; END",
+        "CREATE TRIGGER IF NOT EXISTS archived_messages_fts_delete AFTER DELETE ON archived_messages "
+        "BEGIN DELETE FROM messages_fts WHERE rowid = old.message_id; END",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS message_search ("
+        "message_id INTEGER PRIMARY KEY, document TSVECTOR NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_message_search_document ON message_search USING GIN (document)",
+        "CREATE OR REPLACE FUNCTION message_search_forget_message() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "BEGIN "
+        "DELETE FROM message_search WHERE message_id = OLD.id "
+        "AND NOT EXISTS (SELECT 1 FROM archived_messages WHERE message_id = OLD.id); "
+        "RETURN NULL; "
+        "END $$",
+        "CREATE OR REPLACE FUNCTION message_search_forget_archived() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "BEGIN DELETE FROM message_search WHERE message_id = OLD.message_id; RETURN NULL; END $$",
+        "DROP TRIGGER IF EXISTS message_search_delete ON messages",
+        "CREATE TRIGGER message_search_delete AFTER DELETE ON messages "
+        "FOR EACH ROW EXECUTE FUNCTION message_search_forget_message()",
+        "DROP TRIGGER IF EXISTS message_search_delete ON archived_messages",
+        "CREATE TRIGGER message_search_delete AFTER DELETE ON archived_messages "
+        "FOR EACH ROW EXECUTE FUNCTION message_search_forget_archived()",
+    ],
+}
+
+for _dialect, _statements in SEARCH_INDEX_DDL.items():
+    for _statement in _statements:
+        _statement, _condition = _statement if isinstance(_statement, tuple) else (_statement, None)
+        # After every table: the triggers span messages and archived_messages
+        event.listen(
+            Base.metadata, "after_create", DDL(_statement).execute_if(dialect=_dialect, callable_=_condition)
+        )
@@ -0,0 +1,29 @@
+from sqlalchemy.types import Text, TypeDecorator
+
+from ..config import settings
+from ..utils.compression import decode_text, encode_text, resolve_codec
+
+class CompressedText(TypeDecorator):
+    """
+    Text column whose large values are stored compressed (see
+    utils.compression for the format). Reads always return plain text,
+    whatever the row was written with.
+    """
+    impl = Text
+    cache_ok = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._codec = None
+
+    @property
+    def codec(self) -> str:
+        if self._codec is None:
+            self._codec = resolve_codec(settings.MESSAGE_COMPRESSION_CODEC)
+        return self._codec
+
+    def process_bind_param(self, value, dialect):
+        return encode_text(value, settings.MESSAGE_COMPRESSION_THRESHOLD_BYTES, self.codec)
+
+    def process_result_value(self, value, dialect):
+        return decode_text(value)
@@ -1,13 +1,28 @@
-from typing import List, Optional, Dict
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional, Dict, AsyncIterator
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from datetime import datetime
+import asyncio
+import inspect
+import json
+import time
 
-from ..database import get_db
+from ..database import get_db, AsyncSessionLocal
 from ..models import User, Chat, Message
 from .auth import get_current_user
+from ..services.admission import AdmissionRejected
 from ..services.ai_service import ai_service
+from ..services.chat_archiver import restore_chat
+from ..services.chat_export import InvalidExport, export_chats, import_chats
+from ..services.chat_purger import chat_purger
+from ..services.conversation import add_messages, load_chat_history, refresh_chat_summary
+from ..services.search import SearchUnavailable, search_messages
+from ..utils.pagination import InvalidCursor, Page, keyset_page
 
 router = APIRouter()
 
@@ -29,6 +44,9 @@ class ChatResponse(BaseModel):
     title: str
     created_at: datetime
     updated_at: Optional[datetime]
+    message_count: int = 0
+    last_message_at: Optional[datetime] = None
+    last_message_preview: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -52,11 +70,156 @@ class ChatWithMessages(BaseModel):
     title: str
     created_at: datetime
     updated_at: Optional[datetime]
-    messages: List[MessageResponse]
+    messages: List[MessageResponse]  # Latest page, oldest first
+    before_cursor: Optional[str] = None  # Pass as ?before= to /messages for older ones
 
     class Config:
         from_attributes = True
 
+class SearchHit(BaseModel):
+    message_id: int
+    chat_id: int
+    chat_title: Optional[str]
+    role: str
+    snippet: str  # HTML-escaped, matches wrapped in <mark>
+    created_at: datetime
+    score: float
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchHit]
+    next_offset: Optional[int] = None
+
+class ImportResponse(BaseModel):
+    chats: int
+    messages: int
+
+# Keyset pagination page sizes
+CHAT_PAGE_SIZE = 20
+MESSAGE_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# System prompts for general chat, keyed by context
+CONTEXT_PROMPTS = {
+    "code_generation": "You are an expert code generator. Help users create clean, efficient, and well-documented code in any programming language. Provide complete, runnable examples with explanations.",
+    "debugging": "You are a debugging expert. Help users identify and fix bugs in their code. Analyze error messages, suggest solutions, and explain the root causes of issues.",
+    "api_help": "You are an API documentation expert. Help users understand APIs, generate API endpoints, create request examples, and build comprehensive API documentation.",
+    "cli_help": "You are a command-line expert. Help users with terminal commands, shell scripts, and CLI tools. Provide clear examples and explanations.",
+    "portfolio": "You are a career advisor and technical writer. Help users create professional resumes, portfolios, and showcase their technical skills effectively.",
+    "general": "You are TAI, a friendly and knowledgeable AI developer assistant. Help users with any development-related questions, provide clear explanations, and guide them to the right solutions."
+}
+
+# Server-Sent Events helpers
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx, DO App Platform)
+}
+
+def _sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Event frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+# Work that must outlive a disconnected client's response, kept referenced until done
+_detached_tasks = set()
+
+def _detach(coroutine) -> asyncio.Task:
+    task = asyncio.ensure_future(coroutine)
+    _detached_tasks.add(task)
+    task.add_done_callback(_detached_tasks.discard)
+    return task
+
+async def _complete(on_complete, response_text: str) -> Optional[dict]:
+    extra = on_complete(response_text)
+    if inspect.isawaitable(extra):
+        extra = await extra
+    return extra
+
+async def _after_disconnect(tokens: AsyncIterator[str], on_complete, response_text: str):
+    # Closing the token stream lets the upstream call stop once nobody else reads it
+    await tokens.aclose()
+    if on_complete and response_text:
+        await _complete(on_complete, response_text)
+
+async def _relay_tokens(tokens: AsyncIterator[str], on_complete=None) -> AsyncIterator[str]:
+    """
+    Relay AI tokens as SSE frames and finish with a `done` event.
+    
+    `on_complete` receives the full response text once the stream ends and
+    may return extra fields for the `done` event (e.g. the saved message id);
+    it can be a plain function or a coroutine function. If the client goes
+    away mid-answer it receives the text produced so far instead.
+    """
+    started_at = time.perf_counter()
+    ttft_ms = None
+    parts = []
+    
+    disconnected = True
+    try:
+        async for token in tokens:
+            if ttft_ms is None:
+                ttft_ms = round((time.perf_counter() - started_at) * 1000, 1)
+            parts.append(token)
+            yield _sse_event({"token": token})
+        disconnected = False
+    except AdmissionRejected as e:
+        disconnected = False
+        # The response has started, so overload is reported in-band
+        yield _sse_event({"detail": str(e), "status": 503, "retry_after": e.retry_after}, event="error")
+        return
+    except Exception as e:
+        disconnected = False
+        yield _sse_event({"detail": f"AI service error: {str(e)}"}, event="error")
+        return
+    finally:
+        if disconnected:
+            # Starlette closed or cancelled this generator, nothing here may await anymore
+            _detach(_after_disconnect(tokens, on_complete, "".join(parts)))
+    
+    total_ms = round((time.perf_counter() - started_at) * 1000, 1)
+    print(f"Streamed response: ttft={ttft_ms}ms total={total_ms}ms chunks={len(parts)}")
+    
+    done = {"ttft_ms": ttft_ms, "total_ms": total_ms}
+    if on_complete:
+        # Shielded, so the answer is saved even if the client leaves right now
+        done.update(await asyncio.shield(_detach(_complete(on_complete, "".join(parts)))) or {})
+    yield _sse_event(done, event="done")
+
+# Columns the chat read endpoints serialize; skips the rolling summary text
+CHAT_LISTING_COLUMNS = load_only(
+    Chat.id, Chat.title, Chat.created_at, Chat.updated_at, Chat.archived_at,
+    Chat.message_count, Chat.last_message_at, Chat.last_message_preview
+)
+
+async def _get_user_chat(db: AsyncSession, chat_id: int, user: User, *options) -> Optional[Chat]:
+    result = await db.execute(
+        select(Chat)
+        .where(Chat.id == chat_id, Chat.user_id == user.id, Chat.deleted_at.is_(None))
+        .options(*options)
+    )
+    chat = result.scalars().first()
+    if chat is not None and chat.archived_at is not None:
+        # Opening an archived chat brings its messages back into the hot table
+        await restore_chat(db, chat)
+        await db.commit()
+    return chat
+
+async def _page(db: AsyncSession, query, timestamp_column, id_column, limit: int,
+                before: Optional[str] = None, after: Optional[str] = None) -> Page:
+    try:
+        return await keyset_page(db, query, timestamp_column, id_column, limit, before, after)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _soft_delete(user: User):
+    return (
+        update(Chat)
+        .where(Chat.user_id == user.id, Chat.deleted_at.is_(None))
+        .values(deleted_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
 # Routes
 
 # General chat endpoint (no authentication required)
@@ -67,117 +230,201 @@ async def general_chat(request: GeneralChatRequest):
     Supports: code_generation, debugging, api_help, cli_help, portfolio, general
     """
     
-    # Build system prompts based on context
-    context_prompts = {
-        "code_generation": "You are an expert code generator. Help users create clean, efficient, and well-documented code in any programming language. Provide complete, runnable examples with explanations.",
-        "debugging": "You are a debugging expert. Help users identify and fix bugs in their code. Analyze error messages, suggest solutions, and explain the root causes of issues.",
-        "api_help": "You are an API documentation expert. Help users understand APIs, generate API endpoints, create request examples, and build comprehensive API documentation.",
-        "cli_help": "You are a command-line expert. Help users with terminal commands, shell scripts, and CLI tools. Provide clear examples and explanations.",
-        "portfolio": "You are a career advisor and technical writer. Help users create professional resumes, portfolios, and showcase their technical skills effectively.",
-        "general": "You are TAI, a friendly and knowledgeable AI developer assistant. Help users with any development-related questions, provide clear explanations, and guide them to the right solutions."
-    }
+    system_prompt = CONTEXT_PROMPTS.get(request.context, CONTEXT_PROMPTS["general"])
     
-    system_prompt = context_prompts.get(request.context, context_prompts["general"])
-    
-    # Build conversation with system prompt
-    messages = [{"role": "system", "content": system_prompt}]
-    
-    # Add conversation history
-    if request.conversation_history:
-        messages.extend(request.conversation_history[-10:])  # Last 10 messages for context
-    
-    # Add current user message
-    messages.append({"role": "user", "content": request.message})
-    
-    # Get AI response
+    # Get AI response, the service assembles system prompt + history + user turn
     try:
         response = await ai_service.generate_response(
             user_message=request.message,
-            conversation_history=messages,
-            programming_language=None
+            conversation_history=request.conversation_history,
+            programming_language=None,
+            cache_namespace="general_chat",
+            system_prompt=system_prompt,
+            priority="interactive"
         )
         
         return GeneralChatResponse(
             response=response,
             context=request.context
         )
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
 
+@router.post("/general/stream")
+async def general_chat_stream(request: GeneralChatRequest):
+    """
+    Streaming variant of /general. Emits `data: {"token": ...}` events and a
+    final `event: done` carrying time-to-first-token and total duration.
+    """
+    system_prompt = CONTEXT_PROMPTS.get(request.context, CONTEXT_PROMPTS["general"])
+    
+    tokens = ai_service.stream_response(
+        user_message=request.message,
+        conversation_history=request.conversation_history,
+        programming_language=None,
+        system_prompt=system_prompt,
+        priority="interactive"
+    )
+    
+    def on_complete(response_text: str):
+        return {"context": request.context}
+    
+    return StreamingResponse(
+        _relay_tokens(tokens, on_complete),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.post("/", response_model=ChatResponse)
 async def create_chat(
     chat: ChatCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     db_chat = Chat(
         title=chat.title,
         user_id=current_user.id
     )
     db.add(db_chat)
-    db.commit()
-    db.refresh(db_chat)
+    await db.commit()
+    await db.refresh(db_chat)
     return db_chat
 
 @router.get("/", response_model=List[ChatResponse])
 async def get_user_chats(
+    response: Response,
+    limit: int = Query(CHAT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    The user's chats, most recently updated first. Cursors for the
+    neighbouring pages are returned in the X-Before-Cursor (older) and
+    X-After-Cursor (newer) headers.
+    """
+    page = await _page(
+        db,
+        select(Chat)
+        .where(Chat.user_id == current_user.id, Chat.deleted_at.is_(None))
+        .options(CHAT_LISTING_COLUMNS),
+        Chat.updated_at, Chat.id, limit, before, after
+    )
+    response.headers.update(page.headers())
+    return list(reversed(page.items))
+
+# Declared before /{chat_id} so "search" isn't taken for a chat id
+@router.get("/search", response_model=SearchResponse)
+async def search_chat_messages(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Full-text search over the user's messages, best matches first. Every
+    word must match, as a prefix. 501 on a database without a search index.
+    """
+    try:
+        hits, has_more = await search_messages(db, current_user.id, q, limit, offset)
+    except SearchUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return SearchResponse(
+        query=q,
+        results=hits,
+        next_offset=offset + limit if has_more else None
+    )
+
+@router.get("/export")
+async def export_user_chats(current_user: User = Depends(get_current_user)):
+    """
+    All of the user's chats and messages as NDJSON (see
+    services/chat_export.py), streamed with constant memory.
+    """
+    return StreamingResponse(
+        export_chats(current_user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="tai-chats.ndjson"'}
+    )
+
+@router.post("/import", response_model=ImportResponse)
+async def import_user_chats(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    chats = db.query(Chat).filter(Chat.user_id == current_user.id).order_by(Chat.updated_at.desc()).all()
-    return chats
+    """
+    Add the chats of an /export body to the user's chats. The body is read
+    as it arrives; nothing is imported unless all of it is valid.
+    """
+    try:
+        counts = await import_chats(db, current_user.id, request.stream())
+    except InvalidExport as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    return counts
 
 @router.get("/{chat_id}", response_model=ChatWithMessages)
 async def get_chat(
     chat_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    chat = db.query(Chat).filter(Chat.id == chat_id, Chat.user_id == current_user.id).first()
+    chat = await _get_user_chat(db, chat_id, current_user, CHAT_LISTING_COLUMNS)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
     
-    return chat
+    # One query for the latest page instead of loading the whole relationship
+    page = await _page(
+        db, select(Message).where(Message.chat_id == chat_id),
+        Message.created_at, Message.id, MESSAGE_PAGE_SIZE
+    )
+    return ChatWithMessages(
+        id=chat.id,
+        title=chat.title,
+        created_at=chat.created_at,
+        updated_at=chat.updated_at,
+        messages=page.items,
+        before_cursor=page.before
+    )
 
 @router.post("/{chat_id}/messages", response_model=MessageResponse)
 async def send_message(
     chat_id: int,
     message: MessageCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Verify chat belongs to user
-    chat = db.query(Chat).filter(Chat.id == chat_id, Chat.user_id == current_user.id).first()
+    chat = await _get_user_chat(db, chat_id, current_user)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
     
-    # Save user message
+    # Get conversation history for context (rolling summary + newest turns within
+    # the token budget) before saving the new turn, so it isn't sent twice
+    conversation_history = await load_chat_history(db, chat)
+    # End the read transaction so no pooled connection is held during generation
+    await db.commit()
+    
     user_message = Message(
         content=message.content,
         role="user",
         chat_id=chat_id,
         programming_language=message.programming_language
     )
-    db.add(user_message)
-    
-    # Get conversation history for context
-    conversation_history = []
-    recent_messages = db.query(Message).filter(
-        Message.chat_id == chat_id
-    ).order_by(Message.created_at.desc()).limit(20).all()
-    
-    # Build conversation history (reverse to get chronological order)
-    for msg in reversed(recent_messages):
-        conversation_history.append({
-            "role": msg.role,
-            "content": msg.content
-        })
     
     # Get AI response
     ai_response_content = await ai_service.generate_response(
         user_message=message.content,
         programming_language=message.programming_language,
-        conversation_history=conversation_history
+        conversation_history=conversation_history,
+        priority="interactive"
     )
     
     # Save AI response
@@ -187,43 +434,128 @@ async def send_message(
         chat_id=chat_id,
         programming_language=message.programming_language
     )
-    db.add(ai_message)
     
-    # Update chat timestamp
-    chat.updated_at = datetime.utcnow()
+    # Save both turns, bumping the chat's sidebar columns
+    await add_messages(db, chat_id, user_message, ai_message)
+    await db.commit()
+    await db.refresh(ai_message)
     
-    db.commit()
-    db.refresh(ai_message)
+    # Keep the rolling summary ahead of the token budget, off the request path
+    background_tasks.add_task(refresh_chat_summary, chat_id)
     return ai_message
 
+@router.post("/{chat_id}/messages/stream")
+async def send_message_stream(
+    chat_id: int,
+    message: MessageCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Streaming variant of send_message. Tokens are relayed as Server-Sent
+    Events; the assistant message is persisted once the stream completes and
+    its id is reported in the final `done` event. A client that disconnects
+    mid-answer stops the generation; what it produced so far is saved.
+    """
+    # Verify chat belongs to user
+    chat = await _get_user_chat(db, chat_id, current_user)
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    
+    # Get conversation history before saving the new turn, so it isn't sent twice
+    conversation_history = await load_chat_history(db, chat)
+    
+    # Save user message up front, the request session is gone once streaming starts
+    user_message = Message(
+        content=message.content,
+        role="user",
+        chat_id=chat_id,
+        programming_language=message.programming_language
+    )
+    await add_messages(db, chat_id, user_message)
+    await db.commit()
+    
+    tokens = ai_service.stream_response(
+        user_message=message.content,
+        programming_language=message.programming_language,
+        conversation_history=conversation_history,
+        priority="interactive"
+    )
+    
+    async def on_complete(response_text: str):
+        async with AsyncSessionLocal() as stream_db:
+            ai_message = Message(
+                content=response_text,
+                role="assistant",
+                chat_id=chat_id,
+                programming_language=message.programming_language
+            )
+            await add_messages(stream_db, chat_id, ai_message)
+            await stream_db.commit()
+            return {"message_id": ai_message.id}
+    
+    return StreamingResponse(
+        _relay_tokens(tokens, on_complete),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+        background=BackgroundTask(refresh_chat_summary, chat_id)
+    )
+
 @router.get("/{chat_id}/messages", response_model=List[MessageResponse])
 async def get_chat_messages(
     chat_id: int,
+    response: Response,
+    limit: int = Query(MESSAGE_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
+    """
+    A page of the chat's messages, oldest first; the latest page unless a
+    cursor is given. Cursors for older and newer pages are returned in the
+    X-Before-Cursor and X-After-Cursor headers.
+    """
     # Verify chat belongs to user
-    chat = db.query(Chat).filter(Chat.id == chat_id, Chat.user_id == current_user.id).first()
+    chat = await _get_user_chat(db, chat_id, current_user, load_only(Chat.id, Chat.archived_at))
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
     
-    messages = db.query(Message).filter(Message.chat_id == chat_id).order_by(Message.created_at).all()
-    return messages
+    page = await _page(
+        db, select(Message).where(Message.chat_id == chat_id),
+        Message.created_at, Message.id, limit, before, after
+    )
+    response.headers.update(page.headers())
+    return page.items
 
 @router.delete("/{chat_id}")
 async def delete_chat(
     chat_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    chat = db.query(Chat).filter(Chat.id == chat_id, Chat.user_id == current_user.id).first()
-    if not chat:
+    """
+    Hide the chat immediately; its messages are removed in the background
+    in bounded batches
+    """
+    result = await db.execute(_soft_delete(current_user).where(Chat.id == chat_id))
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Chat not found")
-    
-    db.delete(chat)
-    db.commit()
+    await db.commit()
+    chat_purger.wake()
     return {"message": "Chat deleted successfully"}
 
+@router.delete("/")
+async def delete_all_chats(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete all of the user's chats, the same way as deleting one"""
+    result = await db.execute(_soft_delete(current_user))
+    await db.commit()
+    chat_purger.wake()
+    return {"message": "All chats deleted successfully", "deleted": result.rowcount}
+
 # ==== Content Generation Endpoints ====
 
 class BlogPostRequest(BaseModel):
@@ -241,6 +573,8 @@ async def generate_blog(request: BlogPostRequest):
             length=request.length
         )
         return GeneralChatResponse(response=response, context="content_generation")
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating blog post: {str(e)}")
 
@@ -259,6 +593,8 @@ async def generate_email(request: EmailRequest):
             tone=request.tone
         )
         return GeneralChatResponse(response=response, context="content_generation")
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating email: {str(e)}")
 
@@ -275,6 +611,8 @@ async def generate_summary(request: SummaryRequest):
             length=request.length
         )
         return GeneralChatResponse(response=response, context="content_generation")
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
 
@@ -291,6 +629,8 @@ async def translate_text(request: TranslationRequest):
             target_language=request.target_language
         )
         return GeneralChatResponse(response=response, context="content_generation")
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error translating text: {str(e)}")
 
@@ -305,6 +645,8 @@ async def create_todo(request: TodoRequest):
     try:
         response = await ai_service.create_todo_list(request.task_description)
         return GeneralChatResponse(response=response, context="personal_assistant")
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating todo list: {str(e)}")
 
@@ -321,6 +663,8 @@ async def get_recommendations(request: RecommendationRequest):
             context=request.context
         )
         return GeneralChatResponse(response=response, context="personal_assistant")
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting recommendations: {str(e)}")
 
@@ -333,6 +677,8 @@ async def answer_question(request: KnowledgeRequest):
     try:
         response = await ai_service.answer_knowledge_question(request.question)
         return GeneralChatResponse(response=response, context="personal_assistant")
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error answering question: {str(e)}")
 
@@ -351,6 +697,8 @@ async def plan_schedule(request: ScheduleRequest):
             priority=request.priority
         )
         return GeneralChatResponse(response=response, context="personal_assistant")
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error planning schedule: {str(e)}")
 
@@ -367,5 +715,7 @@ async def brainstorm_ideas(request: BrainstormRequest):
             count=request.count
         )
         return GeneralChatResponse(response=response, context="personal_assistant")
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error brainstorming ideas: {str(e)}")
\ No newline at end of file
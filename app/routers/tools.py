@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict
 
 from ..database import get_db
 from ..models import User
 from .auth import get_current_user
+from ..services.admission import AdmissionRejected
 from ..services.ai_service import ai_service
+from ..services.execution_plan import ExecutionPlan
+from ..services.structured_output import build_structured_prompt, parse_structured_response
+from ..config import settings
 
 router = APIRouter()
 
@@ -14,39 +18,79 @@ class CodeGenerationRequest(BaseModel):
     description: str
     programming_language: str
     framework: Optional[str] = None
+    structured: Optional[bool] = None  # One JSON call instead of one call per field, defaults to TOOLS_STRUCTURED_OUTPUT
 
 class DebugRequest(BaseModel):
     code: str
     error_message: str
     programming_language: str
+    structured: Optional[bool] = None
 
 class APIRequest(BaseModel):
     description: str
     api_type: str = "REST"  # REST, GraphQL, etc.
     programming_language: str
+    structured: Optional[bool] = None
 
 class CLIRequest(BaseModel):
     command_description: str
     tool: str  # git, docker, linux, etc.
+    structured: Optional[bool] = None
 
 class CodeResponse(BaseModel):
     generated_code: str
     explanation: str
+    timings: Optional[Dict[str, float]] = None  # Per-step milliseconds
 
 class DebugResponse(BaseModel):
     analysis: str
     suggested_fix: str
     fixed_code: str
+    timings: Optional[Dict[str, float]] = None  # Per-step milliseconds
 
 class APIResponse(BaseModel):
     api_specification: str
     example_code: str
     documentation: str
+    timings: Optional[Dict[str, float]] = None  # Per-step milliseconds
 
 class CLIResponse(BaseModel):
     command: str
     explanation: str
     example_usage: str
+    timings: Optional[Dict[str, float]] = None  # Per-step milliseconds
+
+# Structured output helpers
+
+def _use_structured(request) -> bool:
+    if request.structured is None:
+        return settings.TOOLS_STRUCTURED_OUTPUT
+    return request.structured
+
+async def _generate_structured(task: str, fields: Dict[str, str], programming_language: Optional[str]):
+    """
+    Fill every response field from a single generation call.
+    Returns (fields, timings); fields is None when the answer can't be parsed.
+    """
+    plan = ExecutionPlan()
+    plan.add("structured", lambda results: ai_service.generate_response(
+        build_structured_prompt(task, fields),
+        programming_language,
+        cache_namespace="tools", priority="tools",
+        # An unparseable answer would otherwise send every repeat down the fallback
+        cacheable=lambda answer: parse_structured_response(answer, fields) is not None
+    ))
+    outcome = await plan.run()
+    sections = parse_structured_response(outcome["structured"], fields)
+    if sections is None:
+        print("Structured tools output could not be parsed, falling back to one call per field")
+    return sections, outcome.timings_report()
+
+def _with_attempt(timings: Dict[str, float], structured_timings: Dict[str, float]) -> Dict[str, float]:
+    """Report a failed structured attempt alongside the fallback plan timings"""
+    if structured_timings:
+        timings["structured_attempt"] = structured_timings["total"]
+    return timings
 
 # Routes
 @router.post("/generate-code", response_model=CodeResponse)
@@ -61,21 +105,36 @@ async def generate_code(
         if request.framework:
             prompt += f" using {request.framework} framework"
 
-        # Get AI response
-        generated_code = await ai_service.generate_code_template(
+        structured_timings = {}
+        if _use_structured(request):
+            sections, structured_timings = await _generate_structured(prompt, {
+                "generated_code": "complete, well-structured code with comments",
+                "explanation": "explanation of how the code works",
+            }, request.programming_language)
+            if sections:
+                return CodeResponse(**sections, timings=structured_timings)
+
+        plan = ExecutionPlan()
+        plan.add("generated_code", lambda results: ai_service.generate_code_template(
             request.description,
             request.programming_language
-        )
-
-        # Generate explanation
-        explanation_prompt = f"Explain this {request.programming_language} code:\n\n{generated_code}"
-        explanation = await ai_service.generate_response(explanation_prompt, request.programming_language)
+        ))
+        # The explanation needs the generated code
+        plan.add("explanation", lambda results: ai_service.generate_response(
+            f"Explain this {request.programming_language} code:\n\n{results['generated_code']}",
+            request.programming_language,
+            cache_namespace="tools", priority="tools"
+        ), depends_on=["generated_code"])
+        outcome = await plan.run()
 
         return CodeResponse(
-            generated_code=generated_code,
-            explanation=explanation
+            generated_code=outcome["generated_code"],
+            explanation=outcome["explanation"],
+            timings=_with_attempt(outcome.timings_report(), structured_timings)
         )
 
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Code generation failed: {str(e)}")
 
@@ -86,23 +145,43 @@ async def debug_code(
 ):
     """Debug code and provide fixes"""
     try:
-        # Get AI analysis and fix
-        analysis = await ai_service.debug_code(
+        structured_timings = {}
+        if _use_structured(request):
+            sections, structured_timings = await _generate_structured(
+                f"I have this {request.programming_language} code that's producing an error:\n\nCode:\n``` {request.programming_language}\n{request.code}\n```\n\nError:\n{request.error_message}\n\nAnalyze the problem and fix it.",
+                {
+                    "analysis": "what causes the error and why",
+                    "suggested_fix": "short summary of the change that fixes it",
+                    "fixed_code": "the complete corrected code",
+                },
+                request.programming_language
+            )
+            if sections:
+                return DebugResponse(**sections, timings=structured_timings)
+
+        plan = ExecutionPlan()
+        plan.add("analysis", lambda results: ai_service.debug_code(
             request.code,
             request.error_message,
             request.programming_language
-        )
-
-        # Generate fixed code suggestion
-        fix_prompt = f"Based on this error analysis, provide the corrected {request.programming_language} code:\n\nOriginal code:\n{request.code}\n\nError: {request.error_message}\n\nAnalysis: {analysis}"
-        fixed_code = await ai_service.generate_response(fix_prompt, request.programming_language)
+        ))
+        # The fixed code suggestion builds on the analysis
+        plan.add("fixed_code", lambda results: ai_service.generate_response(
+            f"Based on this error analysis, provide the corrected {request.programming_language} code:\n\nOriginal code:\n{request.code}\n\nError: {request.error_message}\n\nAnalysis: {results['analysis']}",
+            request.programming_language,
+            cache_namespace="tools", priority="tools"
+        ), depends_on=["analysis"])
+        outcome = await plan.run()
 
         return DebugResponse(
-            analysis=analysis,
+            analysis=outcome["analysis"],
             suggested_fix=f"Here's the corrected code with the fix applied:",
-            fixed_code=fixed_code
+            fixed_code=outcome["fixed_code"],
+            timings=_with_attempt(outcome.timings_report(), structured_timings)
         )
 
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Debug analysis failed: {str(e)}")
 
@@ -121,22 +200,41 @@ async def generate_api(
         else:
             spec_prompt = f"Create an API specification for: {request.description} using {request.api_type}"
 
-        api_spec = await ai_service.generate_response(spec_prompt, request.programming_language)
+        structured_timings = {}
+        if _use_structured(request):
+            sections, structured_timings = await _generate_structured(spec_prompt, {
+                "api_specification": "the API specification",
+                "example_code": f"{request.programming_language} code implementing the API",
+                "documentation": "API documentation with usage examples and authentication if needed",
+            }, request.programming_language)
+            if sections:
+                return APIResponse(**sections, timings=structured_timings)
 
-        # Generate example implementation
         code_prompt = f"Generate {request.programming_language} code to implement this API: {request.description}"
-        example_code = await ai_service.generate_response(code_prompt, request.programming_language)
-
-        # Generate documentation
         docs_prompt = f"Create API documentation for: {request.description}. Include usage examples and authentication if needed."
-        documentation = await ai_service.generate_response(docs_prompt, request.programming_language)
+
+        # Specification, example implementation and documentation are independent
+        plan = ExecutionPlan()
+        plan.add("api_specification", lambda results: ai_service.generate_response(
+            spec_prompt, request.programming_language, cache_namespace="tools", priority="tools"
+        ))
+        plan.add("example_code", lambda results: ai_service.generate_response(
+            code_prompt, request.programming_language, cache_namespace="tools", priority="tools"
+        ))
+        plan.add("documentation", lambda results: ai_service.generate_response(
+            docs_prompt, request.programming_language, cache_namespace="tools", priority="tools"
+        ))
+        outcome = await plan.run()
 
         return APIResponse(
-            api_specification=api_spec,
-            example_code=example_code,
-            documentation=documentation
+            api_specification=outcome["api_specification"],
+            example_code=outcome["example_code"],
+            documentation=outcome["documentation"],
+            timings=_with_attempt(outcome.timings_report(), structured_timings)
         )
 
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"API generation failed: {str(e)}")
 
@@ -147,24 +245,44 @@ async def get_cli_help(
 ):
     """Get CLI command help and examples"""
     try:
-        # Generate CLI command
         command_prompt = f"Provide the {request.tool} command for: {request.command_description}. Include the exact command and explain what it does."
-        command = await ai_service.generate_response(command_prompt, "bash")
 
-        # Generate explanation
-        explanation_prompt = f"Explain this {request.tool} command in detail: {command}"
-        explanation = await ai_service.generate_response(explanation_prompt, "bash")
+        structured_timings = {}
+        if _use_structured(request):
+            sections, structured_timings = await _generate_structured(command_prompt, {
+                "command": f"the exact {request.tool} command",
+                "explanation": "detailed explanation of the command and its options",
+                "example_usage": "a practical example of using the command",
+            }, "bash")
+            if sections:
+                return CLIResponse(**sections, timings=structured_timings)
 
-        # Generate usage example
-        example_prompt = f"Provide a practical example of using this {request.tool} command: {command}"
-        example_usage = await ai_service.generate_response(example_prompt, "bash")
+        # Explanation and usage example both build on the command, but not on each other
+        plan = ExecutionPlan()
+        plan.add("command", lambda results: ai_service.generate_response(
+            command_prompt, "bash", cache_namespace="tools", priority="tools"
+        ))
+        plan.add("explanation", lambda results: ai_service.generate_response(
+            f"Explain this {request.tool} command in detail: {results['command']}",
+            "bash",
+            cache_namespace="tools", priority="tools"
+        ), depends_on=["command"])
+        plan.add("example_usage", lambda results: ai_service.generate_response(
+            f"Provide a practical example of using this {request.tool} command: {results['command']}",
+            "bash",
+            cache_namespace="tools", priority="tools"
+        ), depends_on=["command"])
+        outcome = await plan.run()
 
         return CLIResponse(
-            command=command,
-            explanation=explanation,
-            example_usage=example_usage
+            command=outcome["command"],
+            explanation=outcome["explanation"],
+            example_usage=outcome["example_usage"],
+            timings=_with_attempt(outcome.timings_report(), structured_timings)
         )
 
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"CLI help generation failed: {str(e)}")
 
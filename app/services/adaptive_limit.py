@@ -0,0 +1,100 @@
+import math
+from typing import Any, Dict, Optional
+
+class AdaptiveLimit:
+    """
+    Concurrency limit for one provider/model that tunes itself from
+    observed latency, gradient style (as in Netflix's concurrency-limits).
+
+    Each call reports its latency per generated token, which doesn't
+    depend on how long the answer is. A fast-moving average of it is the
+    current latency; the baseline drops with it right away but rises only
+    over `baseline_window` calls. While the current latency stays within
+    `tolerance` of the baseline the limit grows by about sqrt(limit) per
+    round trip, and it shrinks in proportion once latency climbs above
+    that. Failed calls cut it by `backoff`. The limit only grows while
+    calls actually use at least half of it.
+    """
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        tolerance: float = 1.5,
+        backoff: float = 0.9,
+        baseline_window: int = 500,
+        recent_window: int = 5
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.baseline_window = baseline_window
+        self.recent_window = recent_window
+
+        self.baseline: Optional[float] = None
+        self.recent: Optional[float] = None
+        self.samples = 0
+        self.failures = 0
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    def _set(self, limit: float):
+        limit = min(max(limit, self.min_limit), self.max_limit)
+        if int(limit) > int(self.limit):
+            self.increases += 1
+        elif int(limit) < int(self.limit):
+            self.decreases += 1
+        self.limit = limit
+
+    def record_success(self, seconds: float, tokens: int, in_flight: int) -> int:
+        """Feed one successful call; returns the new limit"""
+        sample = seconds / max(1, tokens)
+        self.samples += 1
+        if self.baseline is None:
+            self.baseline = self.recent = sample
+            return self.current
+
+        self.recent += (sample - self.recent) / self.recent_window
+        # The baseline follows improvements quickly and degradations slowly,
+        # so sustained overload doesn't become the new normal
+        window = self.recent_window if sample < self.baseline else self.baseline_window
+        self.baseline += (sample - self.baseline) / window
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.baseline / self.recent))
+        if gradient < 1.0:
+            target = self.limit * gradient
+        elif in_flight >= self.limit / 2:
+            # Probe upwards only when the current limit is actually being used
+            target = self.limit + math.sqrt(self.limit)
+        else:
+            return self.current
+        # Each completion moves 1/limit of the way, about one step per round trip
+        self._set(self.limit + (target - self.limit) / self.limit)
+        return self.current
+
+    def record_failure(self) -> int:
+        """Errors and timeouts are the strongest overload signal"""
+        self.failures += 1
+        self._set(self.limit * self.backoff)
+        return self.current
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.current,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "baseline_ms_per_token": round(self.baseline * 1000, 2) if self.baseline is not None else None,
+            "recent_ms_per_token": round(self.recent * 1000, 2) if self.recent is not None else None,
+            "samples": self.samples,
+            "failures": self.failures,
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
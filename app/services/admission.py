@@ -0,0 +1,162 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict
+
+from ..config import settings
+
+# Priority classes, most important first. Interactive chat is what users
+# wait on; tools are interactive too but heavier; content generation is
+# bulk work that can wait or be shed.
+PRIORITIES = ("interactive", "tools", "content")
+DEFAULT_PRIORITY = "content"
+
+# Recent queue waits kept per class for the percentiles in stats()
+WAIT_SAMPLES = 200
+
+# Retry-After suggested to rejected callers
+RETRY_AFTER_SECONDS = 5
+
+class AdmissionRejected(Exception):
+    """An upstream call was turned away because its provider is saturated"""
+    def __init__(self, message: str, retry_after: int = RETRY_AFTER_SECONDS):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Bounded concurrency for one provider with a priority queue in front.
+
+    At most `limit` calls run at once. Others wait in their class's FIFO;
+    a freed slot always goes to the most important class waiting. When
+    `max_queue` calls are already waiting, a new call pushes out the least
+    important queued one if it outranks it, and is rejected otherwise.
+    Calls that wait longer than their class's timeout are rejected too.
+    """
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeouts: Dict[str, float]):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max_queue
+        self.queue_timeouts = queue_timeouts
+        self.in_flight = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {priority: deque() for priority in PRIORITIES}
+
+        counters = ("admitted", "rejected", "timed_out", "shed")
+        self.counts = {priority: dict.fromkeys(counters, 0) for priority in PRIORITIES}
+        self.waits_ms: Dict[str, Deque[float]] = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def set_limit(self, limit: int):
+        """Change the concurrency limit; raising it admits waiting calls at once"""
+        self.limit = max(1, limit)
+        self._wake()
+
+    def _wake(self):
+        for priority in PRIORITIES:
+            waiters = self._waiters[priority]
+            while waiters and self.in_flight < self.limit:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    self.in_flight += 1
+                    waiter.set_result(None)
+            if self.in_flight >= self.limit:
+                return
+
+    def _shed_below(self, priority: str) -> bool:
+        """Reject the newest waiter of the least important class below `priority`"""
+        rank = PRIORITIES.index(priority)
+        for victim_priority in reversed(PRIORITIES[rank + 1:]):
+            waiters = self._waiters[victim_priority]
+            while waiters:
+                victim = waiters.pop()
+                if not victim.done():
+                    self.counts[victim_priority]["shed"] += 1
+                    victim.set_exception(AdmissionRejected(
+                        f"{self.name} is overloaded, request shed for higher priority work"
+                    ))
+                    return True
+        return False
+
+    async def acquire(self, priority: str = DEFAULT_PRIORITY):
+        counts = self.counts[priority]
+        if self.in_flight < self.limit and not self.queued():
+            self.in_flight += 1
+            counts["admitted"] += 1
+            self.waits_ms[priority].append(0.0)
+            return
+
+        if self.queued() >= self.max_queue and not self._shed_below(priority):
+            counts["rejected"] += 1
+            raise AdmissionRejected(f"{self.name} is overloaded, try again shortly")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        started_at = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeouts.get(priority))
+        except asyncio.TimeoutError:
+            counts["timed_out"] += 1
+            raise AdmissionRejected(f"{self.name} is overloaded, no capacity within {self.queue_timeouts[priority]:g}s")
+        except asyncio.CancelledError:
+            # Granted just as the caller went away: pass the slot on
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters[priority].remove(waiter)
+                except ValueError:
+                    pass
+        counts["admitted"] += 1
+        self.waits_ms[priority].append((time.monotonic() - started_at) * 1000)
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = DEFAULT_PRIORITY):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        classes = {}
+        for priority in PRIORITIES:
+            waits = sorted(self.waits_ms[priority])
+            classes[priority] = {
+                "queued": len(self._waiters[priority]),
+                **self.counts[priority],
+                "wait_p50_ms": round(waits[len(waits) // 2], 1) if waits else None,
+                "wait_p95_ms": round(waits[int(len(waits) * 0.95)], 1) if waits else None,
+                "wait_max_ms": round(waits[-1], 1) if waits else None,
+            }
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued(),
+            "max_queue": self.max_queue,
+            "classes": classes,
+        }
+
+def create_admission_controllers() -> Dict[str, AdmissionController]:
+    """One controller per provider from application settings"""
+    queue_timeouts = {
+        "interactive": settings.ADMISSION_TIMEOUT_INTERACTIVE_SECONDS,
+        "tools": settings.ADMISSION_TIMEOUT_TOOLS_SECONDS,
+        "content": settings.ADMISSION_TIMEOUT_CONTENT_SECONDS,
+    }
+    return {
+        "ollama": AdmissionController(
+            "ollama", settings.OLLAMA_MAX_CONCURRENCY, settings.ADMISSION_MAX_QUEUE, queue_timeouts
+        ),
+        "digitalocean": AdmissionController(
+            "digitalocean", settings.DIGITALOCEAN_MAX_CONCURRENCY, settings.ADMISSION_MAX_QUEUE, queue_timeouts
+        ),
+    }
@@ -1,6 +1,190 @@
-import httpx
-from typing import Optional, Dict, Any
+import asyncio
+import json
+import time
+from contextlib import aclosing
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable, List
 from ..config import settings
+from .adaptive_limit import AdaptiveLimit
+from .admission import DEFAULT_PRIORITY, AdmissionRejected, create_admission_controllers
+from .cache import CACHE_POLICIES, create_response_cache, make_cache_key, prompt_fingerprint
+from .circuit_breaker import CircuitBreaker
+from .http_clients import create_provider_clients
+from .context_builder import ContextBuilder, count_tokens
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key onto one upstream call.
+    
+    The upstream call runs in its own task, so a caller disconnecting does not
+    cancel the result the other waiters are still awaiting.
+    """
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+    
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved when every waiter went away
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+class SharedStream:
+    """
+    One upstream token stream fanned out to any number of subscribers.
+    
+    Tokens are buffered for the lifetime of the stream, so a subscriber that
+    joins late replays the answer from the first token. When the last
+    subscriber leaves early (client disconnected) the upstream stream is
+    cancelled rather than generating an answer nobody reads.
+    """
+    def __init__(self, source: AsyncIterator[str]):
+        self.tokens: List[str] = []
+        self.done = False
+        self.abandoned = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._changed = asyncio.Condition()
+        self.task = asyncio.ensure_future(self._pump(source))
+    
+    async def _pump(self, source: AsyncIterator[str]):
+        try:
+            async for token in source:
+                async with self._changed:
+                    self.tokens.append(token)
+                    self._changed.notify_all()
+        except BaseException as e:
+            self.error = e
+        finally:
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+    
+    async def subscribe(self) -> AsyncIterator[str]:
+        position = 0
+        self.subscribers += 1
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: position < len(self.tokens) or self.done)
+                    pending = self.tokens[position:]
+                    finished = self.done
+                for token in pending:
+                    yield token
+                position += len(pending)
+                if finished and position >= len(self.tokens):
+                    if self.error is not None:
+                        raise self.error
+                    return
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and not self.done:
+                self.abandoned = True
+                self.task.cancel()
+
+class StreamFlight:
+    """
+    Single-flight for streaming: concurrent callers with the same key share
+    one SharedStream instead of opening their own upstream stream.
+    """
+    def __init__(self):
+        self._streams: Dict[str, SharedStream] = {}
+        self.leaders = 0
+        self.followers = 0
+    
+    async def subscribe(self, key: str, source_factory: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        stream = self._streams.get(key)
+        if stream is None or stream.done or stream.abandoned:
+            self.leaders += 1
+            stream = SharedStream(source_factory())
+            self._streams[key] = stream
+            stream.task.add_done_callback(lambda t: self._finished(key, stream))
+        else:
+            self.followers += 1
+        # Closing this generator (client gone) must reach the subscription right away
+        async with aclosing(stream.subscribe()) as tokens:
+            async for token in tokens:
+                yield token
+    
+    def _finished(self, key: str, stream: SharedStream):
+        if self._streams.get(key) is stream:
+            del self._streams[key]
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._streams),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+class OllamaTimings:
+    """
+    Aggregates the timing breakdown Ollama returns with each completion,
+    separating prompt evaluation (prefill, what prompt caching saves) from
+    token generation
+    """
+    def __init__(self):
+        self.requests = 0
+        self.totals = {
+            "load_ms": 0.0,
+            "prompt_eval_ms": 0.0,
+            "eval_ms": 0.0,
+            "prompt_tokens": 0,
+            "eval_tokens": 0,
+        }
+        self.last: Optional[Dict[str, Any]] = None
+    
+    def record(self, result: Dict[str, Any]):
+        if "eval_duration" not in result and "prompt_eval_duration" not in result:
+            return
+        # Ollama reports durations in nanoseconds
+        timings = {
+            "load_ms": result.get("load_duration", 0) / 1e6,
+            "prompt_eval_ms": result.get("prompt_eval_duration", 0) / 1e6,
+            "eval_ms": result.get("eval_duration", 0) / 1e6,
+            "prompt_tokens": result.get("prompt_eval_count", 0),
+            "eval_tokens": result.get("eval_count", 0),
+        }
+        self.requests += 1
+        for key, value in timings.items():
+            self.totals[key] += value
+        self.last = {key: round(value, 1) for key, value in timings.items()}
+        print(
+            f"Ollama timings: prompt_eval={timings['prompt_eval_ms']:.0f}ms "
+            f"({timings['prompt_tokens']} tokens) eval={timings['eval_ms']:.0f}ms "
+            f"({timings['eval_tokens']} tokens) load={timings['load_ms']:.0f}ms"
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        requests = self.requests or 1
+        eval_seconds = self.totals["eval_ms"] / 1000
+        return {
+            "requests": self.requests,
+            "avg_prompt_eval_ms": round(self.totals["prompt_eval_ms"] / requests, 1),
+            "avg_eval_ms": round(self.totals["eval_ms"] / requests, 1),
+            "avg_load_ms": round(self.totals["load_ms"] / requests, 1),
+            "avg_prompt_tokens": round(self.totals["prompt_tokens"] / requests, 1),
+            "eval_tokens_per_second": round(self.totals["eval_tokens"] / eval_seconds, 1) if eval_seconds else None,
+            "last": self.last,
+        }
 
 class AIService:
     def __init__(self):
@@ -10,150 +194,514 @@ class AIService:
         # Ollama settings
         self.ollama_base_url = getattr(settings, 'OLLAMA_BASE_URL', 'http://localhost:11434')
         self.ollama_model = getattr(settings, 'OLLAMA_MODEL', 'mistral')
+        self.ollama_keep_alive = settings.OLLAMA_KEEP_ALIVE
+        self.ollama_timings = OllamaTimings()
         
         # DigitalOcean GenAI settings
         self.do_api_key = getattr(settings, 'DIGITALOCEAN_API_KEY', None)
         self.do_base_url = 'https://api.digitalocean.com/v2/genai'
         self.do_model = getattr(settings, 'DIGITALOCEAN_MODEL', 'meta-llama/llama-3.1-8b-instruct')
         
-        # Initialize HTTP client with longer timeout for AI operations
-        self.client = httpx.AsyncClient(timeout=120.0)
+        # Sampling parameters shared by both providers
+        self.temperature = 0.7
+        self.top_p = 0.9
+        
+        # Conversation history sent upstream is capped by tokens, not message count
+        self.context_token_budget = settings.CONTEXT_TOKEN_BUDGET
+        
+        # One managed connection pool per provider, opened/closed by the app lifespan
+        self.http = create_provider_clients()
+        
+        # Response cache, endpoints opt in per call via cache_namespace
+        self.cache = create_response_cache()
+        
+        # Coalesce identical in-flight requests onto one upstream call
+        self.inflight = SingleFlight()
+        self.inflight_streams = StreamFlight()
+        
+        # Bounded upstream concurrency per provider, queued by priority class
+        self.admission = create_admission_controllers()
+        # Admission limits tuned from observed latency, per provider:model
+        self.concurrency_limits: Dict[str, AdaptiveLimit] = {}
+        
+        # Per-provider circuit breakers, fed by real calls and health probes
+        self.breakers = {
+            provider: CircuitBreaker(
+                provider,
+                window_seconds=settings.CIRCUIT_BREAKER_WINDOW_SECONDS,
+                min_requests=settings.CIRCUIT_BREAKER_MIN_REQUESTS,
+                error_rate_threshold=settings.CIRCUIT_BREAKER_ERROR_RATE,
+                slow_call_seconds=settings.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+                slow_call_rate_threshold=settings.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+                open_seconds=settings.CIRCUIT_BREAKER_OPEN_SECONDS
+            )
+            for provider in ('digitalocean', 'ollama')
+        }
+        self._health_task: Optional[asyncio.Task] = None
+        self._warmup_task: Optional[asyncio.Task] = None
     
     async def generate_response(
         self, 
         user_message: str, 
         programming_language: Optional[str] = None,
-        conversation_history: Optional[list] = None
+        conversation_history: Optional[list] = None,
+        cache_namespace: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        priority: str = DEFAULT_PRIORITY,
+        cacheable: Optional[Callable[[str], bool]] = None
     ) -> str:
         """
-        Generate AI response for user message using configured AI provider
-        """
-        try:
-            if self.ai_provider == 'digitalocean' and self.do_api_key:
-                return await self._generate_with_digitalocean(
-                    user_message, programming_language, conversation_history
-                )
-            else:
-                return await self._generate_with_ollama(
-                    user_message, programming_language, conversation_history
-                )
-        except Exception as e:
-            print(f"Error generating AI response: {e}")
-            # Fallback to mock response when AI is not available
-            return self._generate_mock_response(user_message, programming_language)
+        Generate AI response for user message using configured AI provider.
+        
+        `system_prompt` replaces the default TAI prompt (e.g. for the
+        context-specific general chat). Pass a `cache_namespace` from
+        CACHE_POLICIES to serve repeated prompts from the response cache;
+        calls without one always hit the provider. `cacheable`, if given,
+        decides which responses are worth caching. `priority` is the
+        admission class (see services/admission.py); raises
+        AdmissionRejected when every provider is saturated.
+        """
+        messages = self.build_messages(
+            user_message, programming_language, conversation_history, system_prompt
+        )
+        fingerprint = self._fingerprint(messages)
+        
+        cache_ttl = CACHE_POLICIES.get(cache_namespace) if cache_namespace else None
+        if cache_ttl:
+            cache_key = make_cache_key(cache_namespace, fingerprint)
+            cached = await self.cache.get(cache_key, cache_namespace)
+            if cached is not None:
+                return cached
+        
+        # Identical prompts already in flight share one upstream call
+        response = await self.inflight.do(
+            fingerprint,
+            lambda: self._generate_uncached(messages, user_message, programming_language, priority)
+        )
+        
+        # Never cache the demo-mode fallback, the provider may be back next time
+        if (
+            cache_ttl
+            and response != self._generate_mock_response(user_message, programming_language)
+            and (cacheable is None or cacheable(response))
+        ):
+            await self.cache.set(cache_key, response, cache_ttl)
+        return response
     
-    async def _generate_with_digitalocean(
+    def build_messages(
         self,
         user_message: str,
         programming_language: Optional[str] = None,
-        conversation_history: Optional[list] = None
-    ) -> str:
+        conversation_history: Optional[list] = None,
+        system_prompt: Optional[str] = None
+    ) -> list:
+        """
+        Conversation assembly shared by every route and both providers:
+        one system prompt first, deduplicated history within the token
+        budget, and the current user turn exactly once at the end
+        """
+        # The system prompt always comes first and only depends on the
+        # language, so Ollama's prompt cache can reuse it across requests
+        system_prompt = system_prompt or self._build_system_prompt(programming_language)
+        builder = self.context_builder()
+        messages = builder.assemble(system_prompt, conversation_history, user_message)
+        print(f"Conversation context: {len(messages)} messages, ~{builder.tokens(messages)} tokens ({builder.model})")
+        return messages
+    
+    def _fingerprint(self, messages: list) -> str:
         """
-        Generate response using DigitalOcean GenAI API
+        Fingerprint of everything sent upstream, shared by the response cache
+        and request coalescing
         """
-        try:
-            system_prompt = self._build_system_prompt(programming_language)
-            
-            # Build messages array for DigitalOcean API
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # Add conversation history
-            if conversation_history:
-                messages.extend(conversation_history[-10:])  # Keep last 10 messages
-            
-            # Add current user message
-            messages.append({"role": "user", "content": user_message})
-            
-            # Call DigitalOcean GenAI API
-            headers = {
-                "Authorization": f"Bearer {self.do_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            response = await self.client.post(
-                f"{self.do_base_url}/chat/completions",
-                headers=headers,
-                json={
-                    "model": self.do_model,
-                    "messages": messages,
-                    "temperature": 0.7,
-                    "max_tokens": 2000,
-                    "top_p": 0.9
-                }
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result["choices"][0]["message"]["content"].strip()
-            else:
-                print(f"DigitalOcean API error: {response.status_code} - {response.text}")
-                # Fallback to Ollama if DigitalOcean fails
-                return await self._generate_with_ollama(
-                    user_message, programming_language, conversation_history
-                )
-                
-        except Exception as e:
-            print(f"DigitalOcean GenAI error: {e}")
-            # Fallback to Ollama
-            return await self._generate_with_ollama(
-                user_message, programming_language, conversation_history
+        return prompt_fingerprint(
+            messages,
+            self._provider_chain()[0],
+            self.active_model(),
+            {"temperature": self.temperature, "top_p": self.top_p}
+        )
+    
+    def active_model(self) -> str:
+        """Model of the preferred provider, used for token counting"""
+        if self._provider_chain()[0] == 'digitalocean':
+            return self.do_model
+        return self.ollama_model
+    
+    def context_builder(self) -> ContextBuilder:
+        return ContextBuilder(self.active_model(), self.context_token_budget)
+    
+    def _provider_chain(self) -> List[str]:
+        """
+        Providers in fallback order: DigitalOcean (when configured) -> Ollama
+        """
+        chain = []
+        if self.ai_provider == 'digitalocean' and self.do_api_key:
+            chain.append('digitalocean')
+        chain.append('ollama')
+        return chain
+    
+    def _provider_model(self, provider: str) -> str:
+        return self.do_model if provider == 'digitalocean' else self.ollama_model
+    
+    def _concurrency_limit(self, provider: str) -> Optional[AdaptiveLimit]:
+        if not settings.ADAPTIVE_CONCURRENCY_ENABLED:
+            return None
+        key = f"{provider}:{self._provider_model(provider)}"
+        if key not in self.concurrency_limits:
+            self.concurrency_limits[key] = AdaptiveLimit(
+                key,
+                initial_limit=self.admission[provider].limit,
+                max_limit=settings.ADAPTIVE_CONCURRENCY_MAX_LIMIT
             )
+        return self.concurrency_limits[key]
     
-    async def _generate_with_ollama(
+    def _adapt_concurrency(self, provider: str, seconds: Optional[float] = None, text: str = ""):
+        """Feed one finished upstream call (seconds=None when it failed) into the provider's limit"""
+        limit = self._concurrency_limit(provider)
+        if limit is None:
+            return
+        admission = self.admission[provider]
+        if seconds is None:
+            admission.set_limit(limit.record_failure())
+        else:
+            tokens = count_tokens(text, self._provider_model(provider))
+            admission.set_limit(limit.record_success(seconds, tokens, admission.in_flight))
+    
+    async def _generate_uncached(
         self,
+        messages: list,
         user_message: str,
         programming_language: Optional[str] = None,
-        conversation_history: Optional[list] = None
+        priority: str = DEFAULT_PRIORITY
     ) -> str:
+        generators = {
+            'digitalocean': self._generate_with_digitalocean,
+            'ollama': self._generate_with_ollama,
+        }
+        
+        rejected = None
+        for provider in self._provider_chain():
+            breaker = self.breakers[provider]
+            # Known-bad providers are skipped instantly instead of costing a timeout
+            if not breaker.allow_request():
+                continue
+            
+            try:
+                async with self.admission[provider].slot(priority):
+                    started_at = time.monotonic()
+                    try:
+                        response = await generators[provider](messages)
+                    except Exception as e:
+                        print(f"Error generating AI response with {provider}: {e}")
+                        breaker.record_failure(time.monotonic() - started_at, e)
+                        self._adapt_concurrency(provider)
+                        continue
+                    self._adapt_concurrency(provider, time.monotonic() - started_at, response)
+            except AdmissionRejected as e:
+                # Saturated, not broken: leave the breaker alone
+                rejected = e
+                continue
+            breaker.record_success(time.monotonic() - started_at)
+            return response
+        
+        # Overloaded is not the same as unavailable, don't hide it behind the mock
+        if rejected is not None:
+            raise rejected
+        
+        # Fallback to mock response when AI is not available
+        return self._generate_mock_response(user_message, programming_language)
+    
+    async def stream_response(
+        self,
+        user_message: str,
+        programming_language: Optional[str] = None,
+        conversation_history: Optional[list] = None,
+        system_prompt: Optional[str] = None,
+        priority: str = DEFAULT_PRIORITY
+    ) -> AsyncIterator[str]:
+        """
+        Stream AI response tokens for user message using configured AI provider.
+        
+        Follows the same DigitalOcean -> Ollama -> mock fallback chain as
+        generate_response, but a provider can only be skipped before it has
+        produced its first token. Concurrent identical requests fan out from
+        a single upstream stream.
+        """
+        messages = self.build_messages(
+            user_message, programming_language, conversation_history, system_prompt
+        )
+        async with aclosing(self.inflight_streams.subscribe(
+            self._fingerprint(messages),
+            lambda: self._stream_uncached(messages, user_message, programming_language, priority)
+        )) as tokens:
+            async for token in tokens:
+                yield token
+    
+    async def _stream_uncached(
+        self,
+        messages: list,
+        user_message: str,
+        programming_language: Optional[str] = None,
+        priority: str = DEFAULT_PRIORITY
+    ) -> AsyncIterator[str]:
+        streams = {
+            'digitalocean': self._stream_with_digitalocean,
+            'ollama': self._stream_with_ollama,
+        }
+        
+        rejected = None
+        for provider in self._provider_chain():
+            breaker = self.breakers[provider]
+            if not breaker.allow_request():
+                continue
+            
+            try:
+                # The slot is held until the stream ends
+                await self.admission[provider].acquire(priority)
+            except AdmissionRejected as e:
+                rejected = e
+                continue
+            started_at = time.monotonic()
+            first_token_latency = None
+            parts = []
+            try:
+                async for token in streams[provider](messages):
+                    if first_token_latency is None:
+                        # Time to first token is the latency that matters for streams
+                        first_token_latency = time.monotonic() - started_at
+                        breaker.record_success(first_token_latency)
+                    parts.append(token)
+                    yield token
+                if first_token_latency is not None:
+                    self._adapt_concurrency(provider, time.monotonic() - started_at, "".join(parts))
+                    return
+                breaker.record_failure(time.monotonic() - started_at, RuntimeError("empty stream"))
+                self._adapt_concurrency(provider)
+            except Exception as e:
+                print(f"Error streaming AI response with {provider}: {e}")
+                self._adapt_concurrency(provider)
+                if first_token_latency is not None:
+                    # Tokens already reached the client, we cannot switch providers mid-answer
+                    return
+                breaker.record_failure(time.monotonic() - started_at, e)
+            finally:
+                self.admission[provider].release()
+        
+        if rejected is not None:
+            raise rejected
+        
+        # Fallback to mock response when no provider is available
+        yield self._generate_mock_response(user_message, programming_language)
+    
+    async def probe_provider(self, provider: str):
         """
-        Generate response using Ollama (local LLM)
+        Cheap reachability check for one provider, fed into its breaker.
+        Any HTTP answer below 500 means the provider is up.
         """
+        timeout = settings.HEALTH_PROBE_TIMEOUT_SECONDS
         try:
-            system_prompt = self._build_system_prompt(programming_language)
-            
-            # Build conversation context
-            context = system_prompt + "\n\n"
-            
-            # Add conversation history if provided
-            if conversation_history:
-                for msg in conversation_history[-10:]:  # Keep last 10 messages for context
-                    role = msg.get("role", "user")
-                    content = msg.get("content", "")
-                    if role == "user":
-                        context += f"User: {content}\n"
-                    elif role == "assistant":
-                        context += f"Assistant: {content}\n"
-            
-            # Add current user message
-            context += f"User: {user_message}\nAssistant:"
-            
-            # Call Ollama API
-            response = await self.client.post(
-                f"{self.ollama_base_url}/api/generate",
-                json={
-                    "model": self.ollama_model,
-                    "prompt": context,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "num_predict": 1000,  # Limit response length
-                    }
-                }
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("response", "").strip()
+            if provider == 'digitalocean':
+                response = await self.http['digitalocean'].get(
+                    f"{self.do_base_url}/models", headers=self._do_headers(), timeout=timeout
+                )
             else:
-                print(f"Ollama API error: {response.status_code} - {response.text}")
-                # Fallback to mock response when Ollama is not available
-                return self._generate_mock_response(user_message, programming_language)
+                response = await self.http['ollama'].get(f"{self.ollama_base_url}/api/tags", timeout=timeout)
+            healthy = response.status_code < 500
+            detail = f"HTTP {response.status_code}"
+        except Exception as e:
+            healthy = False
+            detail = f"{type(e).__name__}: {e}"
+        self.breakers[provider].record_probe(healthy, detail)
+    
+    async def _health_probe_loop(self):
+        while True:
+            for provider in self._provider_chain():
+                await self.probe_provider(provider)
+            await asyncio.sleep(settings.HEALTH_PROBE_INTERVAL_SECONDS)
+    
+    async def startup(self):
+        """Open provider connection pools and start health probes"""
+        for client in self.http.values():
+            client.open()
+        self.start_health_probes()
+        if settings.OLLAMA_WARMUP and 'ollama' in self._provider_chain():
+            # Don't hold up startup on a multi-second model load
+            self._warmup_task = asyncio.create_task(self.warm_up_ollama())
+    
+    async def shutdown(self):
+        """Stop background work and release pooled connections"""
+        await self.stop_health_probes()
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        for client in self.http.values():
+            await client.aclose()
+        await self.cache.close()
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        return {provider: client.stats() for provider, client in self.http.items()}
+    
+    def admission_stats(self) -> Dict[str, Any]:
+        return {provider: self.admission[provider].stats() for provider in self._provider_chain()}
+    
+    def concurrency_stats(self) -> Dict[str, Any]:
+        return {key: limit.stats() for key, limit in self.concurrency_limits.items()}
+    
+    def start_health_probes(self):
+        """Start background health probes (called from the app lifespan)"""
+        if settings.HEALTH_PROBE_INTERVAL_SECONDS > 0 and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_probe_loop())
+    
+    async def stop_health_probes(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+    
+    def provider_health(self) -> Dict[str, Any]:
+        """Breaker state and rolling stats for every provider in the chain"""
+        return {provider: self.breakers[provider].stats() for provider in self._provider_chain()}
+    
+    def _do_headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.do_api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    async def _generate_with_digitalocean(self, messages: list) -> str:
+        """
+        Generate response using DigitalOcean GenAI API
+        """
+        # Call DigitalOcean GenAI API
+        response = await self.http['digitalocean'].post(
+            f"{self.do_base_url}/chat/completions",
+            headers=self._do_headers(),
+            json={
+                "model": self.do_model,
+                "messages": messages,
+                "temperature": self.temperature,
+                "max_tokens": 2000,
+                "top_p": self.top_p
+            }
+        )
+        
+        if response.status_code != 200:
+            raise RuntimeError(f"DigitalOcean API error: {response.status_code} - {response.text}")
+        
+        result = response.json()
+        return result["choices"][0]["message"]["content"].strip()
+    
+    async def _stream_with_digitalocean(self, messages: list) -> AsyncIterator[str]:
+        """
+        Stream response tokens from DigitalOcean GenAI API (OpenAI-style SSE)
+        """
+        async with self.http['digitalocean'].stream(
+            "POST",
+            f"{self.do_base_url}/chat/completions",
+            headers=self._do_headers(),
+            json={
+                "model": self.do_model,
+                "messages": messages,
+                "temperature": self.temperature,
+                "max_tokens": 2000,
+                "top_p": self.top_p,
+                "stream": True
+            }
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise RuntimeError(f"DigitalOcean API error: {response.status_code} - {body.decode(errors='replace')}")
+            
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                if not choices:
+                    continue
+                token = (choices[0].get("delta") or {}).get("content")
+                if token:
+                    yield token
+    
+    def _ollama_payload(self, messages: list, stream: bool) -> Dict[str, Any]:
+        return {
+            "model": self.ollama_model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.ollama_keep_alive,
+            "options": {
+                "temperature": self.temperature,
+                "top_p": self.top_p,
+                "num_predict": 1000,  # Limit response length
+            }
+        }
+    
+    async def _generate_with_ollama(self, messages: list) -> str:
+        """
+        Generate response using Ollama (local LLM) via the messages-based /api/chat
+        """
+        # Call Ollama API
+        response = await self.http['ollama'].post(
+            f"{self.ollama_base_url}/api/chat",
+            json=self._ollama_payload(messages, stream=False)
+        )
+        
+        if response.status_code != 200:
+            raise RuntimeError(f"Ollama API error: {response.status_code} - {response.text}")
+        
+        result = response.json()
+        self.ollama_timings.record(result)
+        return result.get("message", {}).get("content", "").strip()
+    
+    async def _stream_with_ollama(self, messages: list) -> AsyncIterator[str]:
+        """
+        Stream response tokens from Ollama /api/chat (newline-delimited JSON chunks)
+        """
+        async with self.http['ollama'].stream(
+            "POST",
+            f"{self.ollama_base_url}/api/chat",
+            json=self._ollama_payload(messages, stream=True)
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise RuntimeError(f"Ollama API error: {response.status_code} - {body.decode(errors='replace')}")
             
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                token = (chunk.get("message") or {}).get("content")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    # The final chunk carries the timing breakdown
+                    self.ollama_timings.record(chunk)
+                    break
+    
+    async def warm_up_ollama(self):
+        """
+        Load the Ollama model and evaluate the base system prompt so the first
+        real request neither pays the model load nor a cold prompt cache
+        """
+        try:
+            payload = self._ollama_payload([
+                {"role": "system", "content": self._build_system_prompt()},
+                {"role": "user", "content": "Hi"},
+            ], stream=False)
+            payload["options"]["num_predict"] = 1
+            response = await self.http['ollama'].post(f"{self.ollama_base_url}/api/chat", json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"{response.status_code} - {response.text}")
+            result = response.json()
+            self.ollama_timings.record(result)
+            print(f"Ollama model '{self.ollama_model}' warmed up in {result.get('total_duration', 0) / 1e6:.0f}ms")
         except Exception as e:
-            print(f"Ollama error: {e}")
-            # Fallback to mock response when Ollama is not available
-            return self._generate_mock_response(user_message, programming_language)
+            print(f"Ollama warm-up failed: {e}")
     
     def _generate_mock_response(self, user_message: str, programming_language: Optional[str] = None) -> str:
         """
@@ -227,21 +775,41 @@ class AIService:
         Provide detailed explanation of code snippet
         """
         prompt = f"Please explain this {programming_language} code in detail:\n\n``` {programming_language}\n{code}\n```"
-        return await self.generate_response(prompt, programming_language)
+        return await self.generate_response(prompt, programming_language, cache_namespace="tools", priority="tools")
     
     async def debug_code(self, code: str, error_message: str, programming_language: str) -> str:
         """
         Help debug code based on error message
         """
         prompt = f"I have this {programming_language} code that's producing an error:\n\nCode:\n``` {programming_language}\n{code}\n```\n\nError:\n{error_message}\n\nPlease help me debug this issue."
-        return await self.generate_response(prompt, programming_language)
+        return await self.generate_response(prompt, programming_language, cache_namespace="tools", priority="tools")
     
     async def generate_code_template(self, description: str, programming_language: str) -> str:
         """
         Generate code template based on description
         """
         prompt = f"Generate a {programming_language} code template for: {description}\n\nProvide a complete, well-structured example with comments."
-        return await self.generate_response(prompt, programming_language)
+        return await self.generate_response(prompt, programming_language, cache_namespace="tools", priority="tools")
+    
+    async def summarize_conversation(self, previous_summary: Optional[str], turns: list) -> Optional[str]:
+        """
+        Fold older conversation turns into the rolling chat summary.
+        Returns None when no provider could produce a real summary.
+        """
+        transcript = "\n".join(
+            f"{turn.get('role', 'user').capitalize()}: {turn.get('content', '')}" for turn in turns
+        )
+        previous = f"Existing summary:\n{previous_summary}\n\n" if previous_summary else ""
+        prompt = f"""{previous}Update the summary of this conversation with the new turns below.
+
+New turns:
+{transcript}
+
+Write a concise summary (at most 200 words) that keeps facts, decisions, code identifiers and open questions the assistant needs to continue the conversation. Reply with the summary only."""
+        summary = await self._generate_uncached(self.build_messages(prompt), prompt)
+        if summary == self._generate_mock_response(prompt):
+            return None
+        return summary
     
     # ==== Content Generation Features ====
     
@@ -294,7 +862,7 @@ Provide:
 - Important details
 
 Keep it clear and concise."""
-        return await self.generate_response(prompt)
+        return await self.generate_response(prompt, cache_namespace="summary")
     
     async def translate_text(self, text: str, target_language: str) -> str:
         """
@@ -305,7 +873,7 @@ Keep it clear and concise."""
 {text}
 
 Provide a natural, accurate translation that preserves the meaning and tone."""
-        return await self.generate_response(prompt)
+        return await self.generate_response(prompt, cache_namespace="translate")
     
     async def generate_product_description(self, product_name: str, features: list, target_audience: str) -> str:
         """
@@ -369,7 +937,7 @@ Provide:
 - Relevant context or background
 - Examples if helpful
 - Sources or references when applicable"""
-        return await self.generate_response(prompt)
+        return await self.generate_response(prompt, cache_namespace="knowledge")
     
     async def plan_schedule(self, tasks: list, duration: str, priority: str = "balanced") -> str:
         """
@@ -0,0 +1,22 @@
+import json
+from typing import Any, Dict, List
+
+from ..utils.compression import decompress_bytes
+
+# A chat archive (chat_archives.payload) is a compressed JSON list of its
+# messages, one object of these Message columns each, in id order.
+ARCHIVED_FIELDS = ("id", "role", "content", "programming_language", "created_at")
+
+def pack_messages(rows) -> bytes:
+    """JSON for rows of ARCHIVED_FIELDS values, before compression"""
+    documents = []
+    for row in rows:
+        document = dict(zip(ARCHIVED_FIELDS, row))
+        if document["created_at"] is not None:
+            document["created_at"] = document["created_at"].isoformat()
+        documents.append(document)
+    return json.dumps(documents, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def archived_messages(payload: bytes, codec: str) -> List[Dict[str, Any]]:
+    """An archive's messages as dicts of ARCHIVED_FIELDS, created_at in ISO format"""
+    return json.loads(decompress_bytes(payload, codec))
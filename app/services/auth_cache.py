@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional, fall back to the in-process cache
+    aioredis = None
+
+from ..config import settings
+from ..models import User
+from .cache import REDIS_RETRY_SECONDS, LRUCache
+
+# User columns kept in a snapshot; enough for every route that takes
+# get_current_user, which only ever reads these
+SNAPSHOT_FIELDS = ("id", "email", "username", "full_name", "is_active", "created_at")
+
+# Changing any of these must log the user out of cached tokens
+INVALIDATING_FIELDS = ("username", "is_active", "hashed_password")
+
+def _token_key(token: str) -> str:
+    # Tokens are credentials, keep only a hash of them
+    return "tai:auth:token:" + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def _revoked_key(username: str) -> str:
+    return f"tai:auth:revoked:{username}"
+
+def snapshot(user: User) -> Dict[str, Any]:
+    data = {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+    if data["created_at"] is not None:
+        data["created_at"] = data["created_at"].isoformat()
+    return data
+
+def from_snapshot(data: Dict[str, Any]) -> User:
+    """A detached User carrying the snapshot's columns"""
+    data = dict(data)
+    if data.get("created_at"):
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+    return User(**data)
+
+class AuthCache:
+    """
+    Token -> user snapshot cache for get_current_user, so authenticated
+    requests don't need a database round trip.
+
+    Entries live until the token expires or `ttl` passes, whichever is
+    first. Invalidation is per username: entries cached before the user's
+    last invalidation are ignored. The memory backend invalidates only the
+    current worker's cache; the redis backend shares entries and
+    invalidations across workers.
+    """
+    def __init__(
+        self,
+        enabled: bool = True,
+        ttl: int = 300,
+        max_entries: int = 10000,
+        redis_url: Optional[str] = None
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.local = LRUCache(max_entries)
+        self.redis_url = redis_url
+        self._redis = None
+        self._redis_disabled_until = 0.0
+        self._revoked: Dict[str, float] = {}
+        self._pending = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.redis_errors = 0
+
+    def _get_redis(self):
+        if not self.redis_url or aioredis is None:
+            return None
+        if time.monotonic() < self._redis_disabled_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    def _redis_failed(self, error: Exception):
+        print(f"Auth cache Redis error: {error}")
+        self.redis_errors += 1
+        self._redis_disabled_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _shared(self) -> bool:
+        return bool(self.redis_url) and aioredis is not None
+
+    async def get(self, token: str, username: str) -> Optional[User]:
+        if not self.enabled:
+            return None
+
+        entry = revoked = None
+        if self._shared():
+            client = self._get_redis()
+            if client is not None:
+                try:
+                    entry, revoked = await client.mget(_token_key(token), _revoked_key(username))
+                except Exception as e:
+                    self._redis_failed(e)
+        else:
+            entry = self.local.get(_token_key(token))
+            revoked = self._revoked.get(username)
+
+        if entry is not None:
+            cached_at, data = json.loads(entry)
+            if data["username"] == username and (revoked is None or cached_at > float(revoked)):
+                self.hits += 1
+                return from_snapshot(data)
+        self.misses += 1
+        return None
+
+    async def set(self, token: str, user: User, loaded_at: float, expires_at: Optional[float] = None):
+        """
+        Cache `user` for `token`. `loaded_at` is when the user was read, so
+        an invalidation that lands while the row is in flight still wins.
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, int(expires_at - time.time()))
+        if ttl <= 0:
+            return
+
+        entry = json.dumps([loaded_at, snapshot(user)])
+        if self._shared():
+            client = self._get_redis()
+            if client is not None:
+                try:
+                    await client.set(_token_key(token), entry, ex=ttl)
+                except Exception as e:
+                    self._redis_failed(e)
+        else:
+            self.local.set(_token_key(token), entry, ttl)
+
+    async def invalidate(self, usernames: Iterable[str]):
+        """Drop every cached token of these users"""
+        now = time.time()
+        usernames = list(usernames)
+        self.invalidations += len(usernames)
+        # Entries older than the TTL are gone anyway
+        self._revoked = {name: at for name, at in self._revoked.items() if at > now - self.ttl}
+        for username in usernames:
+            self._revoked[username] = now
+
+        client = self._get_redis() if self._shared() else None
+        if client is not None:
+            try:
+                for username in usernames:
+                    await client.set(_revoked_key(username), now, ex=self.ttl)
+            except Exception as e:
+                self._redis_failed(e)
+
+    def invalidate_soon(self, usernames: Iterable[str]):
+        """invalidate() from synchronous code, e.g. session events"""
+        usernames = list(usernames)
+        now = time.time()
+        for username in usernames:
+            self._revoked[username] = now
+        try:
+            task = asyncio.get_running_loop().create_task(self.invalidate(usernames))
+        except RuntimeError:
+            # No event loop (a script): there is no shared state to reach either
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": "redis" if self._shared() else "memory",
+            "ttl_seconds": self.ttl,
+            "entries": len(self.local),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "redis_errors": self.redis_errors,
+        }
+
+auth_cache = AuthCache(
+    enabled=settings.AUTH_CACHE_ENABLED,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    redis_url=settings.REDIS_URL if settings.AUTH_CACHE_BACKEND == "redis" else None
+)
+
+# Invalidate on any ORM change to a user's credentials or status, once committed
+
+_PENDING_KEY = "auth_cache_invalidate"
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        names = set()
+        if obj in session.deleted:
+            names.add(obj.username)
+        for field in INVALIDATING_FIELDS:
+            history = state.attrs[field].history
+            if history.has_changes():
+                names.add(obj.username)
+                if field == "username":
+                    names.update(name for name in history.deleted if name)
+        if names:
+            session.info.setdefault(_PENDING_KEY, set()).update(names)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    usernames = session.info.pop(_PENDING_KEY, None)
+    if usernames:
+        auth_cache.invalidate_soon(usernames)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_changed_users(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional, fall back to the in-process tier only
+    aioredis = None
+
+from ..config import settings
+
+# Per-endpoint cache policies (namespace -> TTL in seconds).
+# Endpoints opt in by passing one of these namespaces to
+# AIService.generate_response; anything else is never cached.
+CACHE_POLICIES = {
+    "general_chat": 300,         # Unauthenticated chat, short-lived
+    "tools": 3600,               # Developer tools (code, debug, API, CLI)
+    "summary": 86400,
+    "knowledge": 86400,
+    "translate": 7 * 86400,
+}
+
+# How long to stop talking to Redis after an error
+REDIS_RETRY_SECONDS = 30.0
+
+def _normalize(text: str) -> str:
+    """
+    Trim the ends and unify line endings. Whitespace inside is kept as is:
+    in code, indentation and line breaks change what the prompt means.
+    """
+    return (text or "").replace("\r\n", "\n").strip()
+
+def prompt_fingerprint(
+    messages: list,
+    provider: str,
+    model: str,
+    params: Dict[str, Any]
+) -> str:
+    """
+    Hash everything that influences the completion into a stable fingerprint
+    """
+    payload = json.dumps({
+        "messages": [
+            {"role": msg.get("role"), "content": _normalize(msg.get("content", ""))}
+            for msg in messages
+        ],
+        "provider": provider,
+        "model": model,
+        "params": params,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def make_cache_key(namespace: str, fingerprint: str) -> str:
+    return f"tai:resp:{namespace}:{fingerprint}"
+
+class LRUCache:
+    """
+    In-process LRU cache with per-entry TTL and a size limit
+    """
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class ResponseCache:
+    """
+    Two-tier response cache: in-process LRU in front of an optional shared
+    Redis tier, so gunicorn workers can reuse each other's completions.
+    """
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_entries: int = 1000,
+        redis_url: Optional[str] = None
+    ):
+        self.enabled = enabled
+        self.local = LRUCache(max_entries)
+        self.redis_url = redis_url
+        self._redis = None
+        self._redis_disabled_until = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.redis_errors = 0
+        self.stores = 0
+        self.namespaces: Dict[str, Dict[str, int]] = {}
+
+    def _get_redis(self):
+        if not self.redis_url or aioredis is None:
+            return None
+        if time.monotonic() < self._redis_disabled_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    def _redis_failed(self, error: Exception):
+        print(f"Response cache Redis error: {error}")
+        self.redis_errors += 1
+        self._redis_disabled_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _count(self, namespace: str, outcome: str):
+        counters = self.namespaces.setdefault(namespace, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    async def get(self, key: str, namespace: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        value = self.local.get(key)
+        if value is not None:
+            self.hits += 1
+            self.local_hits += 1
+            self._count(namespace, "hits")
+            return value
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                value = await client.get(key)
+                if value is not None:
+                    ttl = await client.ttl(key)
+                    if ttl and ttl > 0:
+                        self.local.set(key, value, ttl)
+                    self.hits += 1
+                    self.redis_hits += 1
+                    self._count(namespace, "hits")
+                    return value
+            except Exception as e:
+                self._redis_failed(e)
+
+        self.misses += 1
+        self._count(namespace, "misses")
+        return None
+
+    async def set(self, key: str, value: str, ttl: int):
+        if not self.enabled:
+            return
+
+        self.local.set(key, value, ttl)
+        self.stores += 1
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                await client.set(key, value, ex=ttl)
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": "redis" if self.redis_url and aioredis is not None else "memory",
+            "entries": len(self.local),
+            "max_entries": self.local.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "redis_errors": self.redis_errors,
+            "stores": self.stores,
+            "evictions": self.local.evictions,
+            "namespaces": self.namespaces,
+        }
+
+def create_response_cache() -> ResponseCache:
+    """Build the response cache from application settings"""
+    return ResponseCache(
+        enabled=settings.CACHE_ENABLED,
+        max_entries=settings.CACHE_MAX_ENTRIES,
+        redis_url=settings.REDIS_URL if settings.CACHE_BACKEND == "redis" else None
+    )
@@ -0,0 +1,192 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..models import ArchivedMessage, Chat, ChatArchive, Message
+from ..utils.compression import compress_bytes, resolve_codec
+from .archive_format import ARCHIVED_FIELDS, archived_messages, pack_messages
+from .search import index_messages
+
+def _unpack(payload: bytes, codec: str, chat_id: int) -> List[Message]:
+    messages = []
+    for document in archived_messages(payload, codec):
+        created_at = document.get("created_at")
+        messages.append(Message(
+            id=document["id"],
+            chat_id=chat_id,
+            role=document["role"],
+            content=document["content"],
+            programming_language=document.get("programming_language"),
+            created_at=datetime.fromisoformat(created_at) if created_at else None
+        ))
+    return messages
+
+async def archive_chat(db: AsyncSession, chat_id: int) -> int:
+    """
+    Move a chat's messages into one compressed chat_archives row. They
+    stay in the search index. The caller commits. Returns the number of
+    messages moved.
+    """
+    result = await db.execute(
+        select(*(getattr(Message, field) for field in ARCHIVED_FIELDS))
+        .where(Message.chat_id == chat_id)
+        .order_by(Message.id)
+    )
+    rows = result.all()
+    if not rows:
+        return 0
+
+    codec = resolve_codec(settings.MESSAGE_COMPRESSION_CODEC)
+    db.add(ChatArchive(
+        chat_id=chat_id,
+        codec=codec,
+        payload=compress_bytes(pack_messages(rows), codec),
+        message_count=len(rows)
+    ))
+    await db.flush()
+    # Before the delete: these rows keep the messages' search entries
+    await db.execute(
+        insert(ArchivedMessage),
+        [{"message_id": row.id, "chat_id": chat_id} for row in rows]
+    )
+    # Only what was packed: a message written meanwhile stays in the hot table
+    await db.execute(
+        delete(Message)
+        .where(Message.chat_id == chat_id, Message.id <= rows[-1].id)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        update(Chat)
+        .where(Chat.id == chat_id)
+        # updated_at is the sidebar order, archiving mustn't bump it
+        .values(archived_at=datetime.utcnow(), updated_at=Chat.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    await db.flush()
+    return len(rows)
+
+async def restore_chat(db: AsyncSession, chat: Chat) -> int:
+    """
+    Move an archived chat's messages back into `messages` (same ids, so
+    the rolling summary and cursors stay valid) and re-index them for
+    search. The caller commits. Returns the number of messages restored.
+    """
+    # Claiming the archive row by deleting it makes concurrent restores
+    # safe. Its archived_messages rows, and their search entries, go with it
+    result = await db.execute(
+        delete(ChatArchive)
+        .where(ChatArchive.chat_id == chat.id)
+        .returning(ChatArchive.payload, ChatArchive.codec)
+        .execution_options(synchronize_session=False)
+    )
+    claimed = result.first()
+    restored = []
+    if claimed:
+        restored = _unpack(claimed.payload, claimed.codec, chat.id)
+        db.add_all(restored)
+        await db.flush()
+        await index_messages(db, restored)
+
+    await db.execute(
+        update(Chat)
+        .where(Chat.id == chat.id)
+        .values(archived_at=None, restored_at=datetime.utcnow(), updated_at=Chat.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    set_committed_value(chat, "archived_at", None)
+    return len(restored)
+
+class ChatArchiver:
+    """
+    Moves the messages of chats idle for `archive_after_days` out of the
+    hot `messages` table and its indexes into chat_archives. They remain
+    searchable; opening the chat again restores them.
+    """
+    def __init__(self, archive_after_days: int, interval_seconds: float, batch_size: int):
+        self.archive_after_days = archive_after_days
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task = None
+        self.chats_archived = 0
+        self.messages_archived = 0
+        self.last_error = None
+
+    def start(self):
+        """Start the archival loop (called from the app lifespan)"""
+        if self.archive_after_days > 0 and self.interval_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                while await self.archive_once():
+                    pass
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Error archiving idle chats: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def archive_once(self) -> int:
+        """Archive one batch of idle chats, returning how many were archived"""
+        cutoff = datetime.utcnow() - timedelta(days=self.archive_after_days)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Chat.id)
+                .where(
+                    Chat.archived_at.is_(None),
+                    Chat.deleted_at.is_(None),
+                    Chat.message_count > 0,
+                    Chat.updated_at < cutoff,
+                    or_(Chat.restored_at.is_(None), Chat.restored_at < cutoff)
+                )
+                .order_by(Chat.id)
+                .limit(self.batch_size)
+            )
+            chat_ids = list(result.scalars().all())
+
+        archived = 0
+        for chat_id in chat_ids:
+            # One short transaction per chat
+            async with AsyncSessionLocal() as db:
+                try:
+                    moved = await archive_chat(db, chat_id)
+                    await db.commit()
+                except IntegrityError:
+                    # Another worker archived it first
+                    await db.rollback()
+                    continue
+            archived += 1
+            self.messages_archived += moved
+        self.chats_archived += archived
+        return archived
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "archive_after_days": self.archive_after_days,
+            "chats_archived": self.chats_archived,
+            "messages_archived": self.messages_archived,
+            "last_error": self.last_error,
+        }
+
+chat_archiver = ChatArchiver(
+    settings.CHAT_ARCHIVE_AFTER_DAYS,
+    settings.CHAT_ARCHIVE_INTERVAL_SECONDS,
+    settings.CHAT_ARCHIVE_BATCH_SIZE
+)
@@ -0,0 +1,253 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import AsyncSessionLocal
+from ..models import Chat, ChatArchive, Message
+from .archive_format import archived_messages
+from .conversation import message_preview
+from .search import index_message_rows
+
+# Export format: one JSON document per line. A header line, then each chat
+# followed by its messages, oldest first:
+#
+#   {"type": "export", "format": "tai-chats", "version": 1, "exported_at": "..."}
+#   {"type": "chat", "id": 7, "title": "...", "created_at": "...", "updated_at": "..."}
+#   {"type": "message", "chat": 7, "role": "user", "content": "...", "programming_language": null, "created_at": "..."}
+#
+# Both directions work in bounded memory: the export reads chats in keyset
+# batches and their messages from a server-side cursor, the import reads
+# the request body line by line and inserts messages in batches.
+
+EXPORT_FORMAT = "tai-chats"
+EXPORT_VERSION = 1
+
+# Chats per export query; their messages are streamed EXPORT_FETCH_SIZE rows at a time
+EXPORT_CHAT_BATCH = 200
+EXPORT_FETCH_SIZE = 1000
+
+# Messages per INSERT when importing
+IMPORT_BATCH_SIZE = 1000
+
+# Longest line accepted by the import, so a body without newlines can't exhaust memory
+IMPORT_MAX_LINE_BYTES = 16 * 1024 * 1024
+
+MESSAGE_ROLES = ("user", "assistant")
+
+class InvalidExport(ValueError):
+    """An import body that isn't a TAI chat export"""
+
+def _line(document: Dict[str, Any]) -> str:
+    return json.dumps(document, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def _message_line(chat_id: int, role: str, content: str, programming_language: Optional[str],
+                  created_at: Optional[str]) -> str:
+    return _line({
+        "type": "message",
+        "chat": chat_id,
+        "role": role,
+        "content": content,
+        "programming_language": programming_language,
+        "created_at": created_at,
+    })
+
+async def export_chats(user_id: int) -> AsyncIterator[str]:
+    """NDJSON lines of all of a user's chats and messages, archived ones included"""
+    yield _line({
+        "type": "export",
+        "format": EXPORT_FORMAT,
+        "version": EXPORT_VERSION,
+        "exported_at": datetime.utcnow().isoformat(),
+    })
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Chat.id, Chat.title, Chat.created_at, Chat.updated_at, Chat.archived_at)
+                .where(Chat.user_id == user_id, Chat.deleted_at.is_(None), Chat.id > last_id)
+                .order_by(Chat.id)
+                .limit(EXPORT_CHAT_BATCH)
+            )
+            chats = result.all()
+            if not chats:
+                return
+
+            # One cursor over the whole batch's messages, grouped by chat
+            messages = await db.stream(
+                select(Message.chat_id, Message.role, Message.content, Message.programming_language, Message.created_at)
+                .where(Message.chat_id.in_([chat.id for chat in chats]))
+                .order_by(Message.chat_id, Message.id)
+                .execution_options(yield_per=EXPORT_FETCH_SIZE)
+            )
+            pending = await messages.fetchone()
+            for chat in chats:
+                yield _line({
+                    "type": "chat",
+                    "id": chat.id,
+                    "title": chat.title,
+                    "created_at": _isoformat(chat.created_at),
+                    "updated_at": _isoformat(chat.updated_at),
+                })
+                if chat.archived_at is not None:
+                    archive = (await db.execute(
+                        select(ChatArchive.payload, ChatArchive.codec).where(ChatArchive.chat_id == chat.id)
+                    )).first()
+                    if archive:
+                        for document in archived_messages(archive.payload, archive.codec):
+                            yield _message_line(
+                                chat.id, document["role"], document["content"],
+                                document.get("programming_language"), document.get("created_at")
+                            )
+                while pending is not None and pending.chat_id == chat.id:
+                    yield _message_line(
+                        chat.id, pending.role, pending.content,
+                        pending.programming_language, _isoformat(pending.created_at)
+                    )
+                    pending = await messages.fetchone()
+            await messages.close()
+        last_id = chats[-1].id
+
+async def _read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > IMPORT_MAX_LINE_BYTES:
+            raise InvalidExport(f"Line longer than {IMPORT_MAX_LINE_BYTES} bytes")
+    if buffer:
+        yield buffer
+
+def _timestamp(document: Dict[str, Any], field: str, line_number: int) -> Optional[datetime]:
+    """An ISO timestamp as naive UTC, like the rest of the database"""
+    value = document.get(field)
+    if value is None:
+        return None
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidExport(f"Line {line_number}: invalid {field}")
+    if timestamp.tzinfo is not None:
+        # PostgreSQL exports carry an offset
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+def _field(document: Dict[str, Any], field: str, types: tuple, line_number: int) -> Any:
+    """An optional scalar field, rejected unless it's one of `types`"""
+    value = document.get(field)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, types)):
+        raise InvalidExport(f"Line {line_number}: invalid {field}")
+    return value
+
+async def import_chats(db: AsyncSession, user_id: int, chunks: AsyncIterator[bytes]) -> Dict[str, int]:
+    """
+    Create chats for `user_id` from an export body, read chunk by chunk.
+    Runs in the caller's transaction (commit on success, roll back on
+    InvalidExport). Returns the number of chats and messages imported.
+    """
+    chat_ids: Dict[Any, int] = {}  # exported chat id -> new chat id
+    stats: Dict[int, Dict[str, Any]] = {}
+    batch: List[Dict[str, Any]] = []
+    imported_messages = 0
+
+    async def write_batch():
+        # Multi-row INSERT ... RETURNING, ids in parameter order
+        result = await db.execute(
+            insert(Message).returning(Message.id, sort_by_parameter_order=True),
+            batch
+        )
+        await index_message_rows(db, [
+            {"id": message_id, "content": row["content"]}
+            for message_id, row in zip(result.scalars(), batch)
+        ])
+        batch.clear()
+
+    header = None
+    line_number = 0
+    async for raw in _read_lines(chunks):
+        line_number += 1
+        if not raw.strip():
+            continue
+        try:
+            document = json.loads(raw)
+        except ValueError:
+            raise InvalidExport(f"Line {line_number}: not JSON")
+        if not isinstance(document, dict):
+            raise InvalidExport(f"Line {line_number}: expected an object")
+
+        kind = document.get("type")
+        if header is None:
+            if kind != "export" or document.get("format") != EXPORT_FORMAT:
+                raise InvalidExport("Missing export header")
+            if not isinstance(document.get("version"), int) or document["version"] > EXPORT_VERSION:
+                raise InvalidExport(f"Unsupported export version {document.get('version')}")
+            header = document
+
+        elif kind == "chat":
+            exported_id = _field(document, "id", (int, str), line_number)
+            title = _field(document, "title", (str,), line_number) or "Imported Chat"
+            values = {"user_id": user_id, "title": title}
+            for field in ("created_at", "updated_at"):
+                timestamp = _timestamp(document, field, line_number)
+                if timestamp is not None:
+                    values[field] = timestamp
+            result = await db.execute(insert(Chat).values(**values).returning(Chat.id))
+            chat_id = result.scalar_one()
+            chat_ids[exported_id] = chat_id
+            stats[chat_id] = {"chat_id": chat_id, "count": 0, "last_at": None, "preview": None}
+
+        elif kind == "message":
+            chat_id = chat_ids.get(_field(document, "chat", (int, str), line_number))
+            if chat_id is None:
+                raise InvalidExport(f"Line {line_number}: message before its chat")
+            role = _field(document, "role", (str,), line_number)
+            content = _field(document, "content", (str,), line_number)
+            if role not in MESSAGE_ROLES or content is None:
+                raise InvalidExport(f"Line {line_number}: invalid message")
+            created_at = _timestamp(document, "created_at", line_number) or datetime.utcnow()
+            batch.append({
+                "chat_id": chat_id,
+                "role": role,
+                "content": content,
+                "programming_language": _field(document, "programming_language", (str,), line_number),
+                "created_at": created_at,
+            })
+            chat_stats = stats[chat_id]
+            chat_stats["count"] += 1
+            if chat_stats["last_at"] is None or created_at >= chat_stats["last_at"]:
+                chat_stats["last_at"] = created_at
+                chat_stats["preview"] = message_preview(content)
+            imported_messages += 1
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await write_batch()
+
+        else:
+            raise InvalidExport(f"Line {line_number}: unknown type {kind!r}")
+
+    if header is None:
+        raise InvalidExport("Empty export")
+    if batch:
+        await write_batch()
+
+    if stats:
+        chats = Chat.__table__
+        await db.execute(
+            update(chats)
+            .where(chats.c.id == bindparam("chat_id"))
+            .values(
+                message_count=bindparam("count"),
+                last_message_at=bindparam("last_at"),
+                last_message_preview=bindparam("preview"),
+                # Keep the exported updated_at rather than applying the onupdate
+                updated_at=chats.c.updated_at
+            ),
+            list(stats.values())
+        )
+    return {"chats": len(stats), "messages": imported_messages}
@@ -0,0 +1,115 @@
+import asyncio
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, select
+
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..models import Chat, Message
+
+class ChatPurger:
+    """
+    Removes soft-deleted chats in the background.
+
+    Deleting a chat only stamps `deleted_at`; this worker then deletes its
+    messages with set-based DELETEs of at most `batch_size` rows, each in
+    its own short transaction, and finally the chat rows themselves.
+    """
+    # Soft-deleted chats handled per pass
+    CHATS_PER_PASS = 100
+
+    def __init__(self, interval_seconds: float, batch_size: int):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task = None
+        self._wake = asyncio.Event()
+        self.chats_purged = 0
+        self.messages_purged = 0
+        self.last_error = None
+
+    def start(self):
+        """Start the purge loop (called from the app lifespan)"""
+        if self.interval_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        """Purge now rather than at the next interval"""
+        self._wake.set()
+
+    async def _loop(self):
+        while True:
+            self._wake.clear()
+            try:
+                while await self.purge_once():
+                    pass
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Error purging deleted chats: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _delete_messages(self, chat_ids: List[int]) -> int:
+        deleted = 0
+        while True:
+            batch = (
+                select(Message.id)
+                .where(Message.chat_id.in_(chat_ids))
+                .limit(self.batch_size)
+                .scalar_subquery()
+            )
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    delete(Message)
+                    .where(Message.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+            deleted += result.rowcount
+            if result.rowcount < self.batch_size:
+                return deleted
+
+    async def purge_once(self) -> int:
+        """Purge one pass of soft-deleted chats, returning how many were removed"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Chat.id)
+                .where(Chat.deleted_at.isnot(None))
+                .order_by(Chat.id)
+                .limit(self.CHATS_PER_PASS)
+            )
+            chat_ids = list(result.scalars().all())
+        if not chat_ids:
+            return 0
+
+        self.messages_purged += await self._delete_messages(chat_ids)
+        async with AsyncSessionLocal() as db:
+            # Anything written since (e.g. a stream finishing) goes with the chat via ON DELETE CASCADE
+            result = await db.execute(
+                delete(Chat)
+                .where(Chat.id.in_(chat_ids), Chat.deleted_at.isnot(None))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        self.chats_purged += result.rowcount
+        return result.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "chats_purged": self.chats_purged,
+            "messages_purged": self.messages_purged,
+            "last_error": self.last_error,
+        }
+
+chat_purger = ChatPurger(settings.CHAT_PURGE_INTERVAL_SECONDS, settings.CHAT_PURGE_BATCH_SIZE)
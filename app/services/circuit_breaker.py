@@ -0,0 +1,158 @@
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+def _percentile_ms(sorted_values, fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return round(sorted_values[index] * 1000, 1)
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker over a rolling time window.
+
+    - closed: calls flow; the breaker opens once the window holds at least
+      `min_requests` calls and either the error rate or the slow-call rate
+      crosses its threshold
+    - open: calls are rejected instantly until `open_seconds` have passed
+      (or a health probe sees the provider come back)
+    - half_open: a limited number of trial calls decide between closing
+      again and re-opening
+    """
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60.0,
+        min_requests: int = 5,
+        error_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 30.0,
+        slow_call_rate_threshold: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_probe: Optional[Dict[str, Any]] = None
+        self.rejected = 0
+        self.transitions = 0
+        self._half_open_calls = 0
+        self._half_open_since = 0.0
+        # (timestamp, ok, latency_seconds)
+        self._window: deque = deque()
+
+    def _prune(self, now: float):
+        while self._window and now - self._window[0][0] > self.window_seconds:
+            self._window.popleft()
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        print(f"Circuit breaker '{self.name}': {self.state} -> {state}")
+        self.state = state
+        self.transitions += 1
+        self._half_open_calls = 0
+        if state == HALF_OPEN:
+            self._half_open_since = time.monotonic()
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        elif state == CLOSED:
+            self.opened_at = None
+            self._window.clear()
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to the provider right now"""
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        elif self.state == HALF_OPEN and now - self._half_open_since >= self.open_seconds:
+            # Trial calls that never reported back (e.g. cancelled) must not wedge the breaker
+            self._half_open_calls = 0
+            self._half_open_since = now
+
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self, latency: float):
+        self._record(True, latency)
+
+    def record_failure(self, latency: float, error: Optional[Exception] = None):
+        if error is not None:
+            self.last_error = f"{type(error).__name__}: {error}"
+        self._record(False, latency)
+
+    def _record(self, ok: bool, latency: float):
+        now = time.monotonic()
+
+        if self.state == HALF_OPEN:
+            # A trial call decides the breaker's fate
+            slow = latency >= self.slow_call_seconds
+            self._transition(CLOSED if ok and not slow else OPEN)
+            if self.state == OPEN:
+                return
+
+        self._window.append((now, ok, latency))
+        self._prune(now)
+
+        if self.state == CLOSED and len(self._window) >= self.min_requests:
+            error_rate, slow_rate = self._rates()
+            if error_rate >= self.error_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                self._transition(OPEN)
+
+    def record_probe(self, healthy: bool, detail: Optional[str] = None):
+        """
+        Feed a background health probe result: a failed probe opens the
+        breaker straight away, a successful one lets an open breaker try
+        real traffic again without waiting for `open_seconds`
+        """
+        self.last_probe = {"healthy": healthy, "detail": detail, "at": time.time()}
+        if not healthy and self.state != OPEN:
+            self.last_error = detail
+            self._transition(OPEN)
+        elif healthy and self.state == OPEN:
+            self._transition(HALF_OPEN)
+
+    def _rates(self):
+        total = len(self._window)
+        if not total:
+            return 0.0, 0.0
+        errors = sum(1 for _, ok, _ in self._window if not ok)
+        slow = sum(1 for _, _, latency in self._window if latency >= self.slow_call_seconds)
+        return errors / total, slow / total
+
+    def stats(self) -> Dict[str, Any]:
+        self._prune(time.monotonic())
+        error_rate, slow_rate = self._rates()
+        latencies = sorted(latency for _, _, latency in self._window)
+        return {
+            "state": self.state,
+            "window_requests": len(latencies),
+            "error_rate": round(error_rate, 4),
+            "slow_call_rate": round(slow_rate, 4),
+            "p50_latency_ms": _percentile_ms(latencies, 0.50),
+            "p95_latency_ms": _percentile_ms(latencies, 0.95),
+            "rejected": self.rejected,
+            "transitions": self.transitions,
+            "last_error": self.last_error,
+            "last_probe": self.last_probe,
+        }
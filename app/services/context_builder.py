@@ -0,0 +1,143 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+# Rough characters-per-token ratios by model family. We don't ship a
+# tokenizer per model; these keep budgets within a few percent of the real
+# counts for English prose and code. First match wins, so more specific
+# families come before the ones they contain (codellama before llama).
+CHARS_PER_TOKEN = [
+    ("codellama", 3.3),
+    ("llama", 3.8),
+    ("mistral", 3.6),
+]
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Role markers and separators each message costs on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+def count_tokens(text: str, model: str = "") -> int:
+    """Estimate the number of tokens `text` takes for `model`"""
+    if not text:
+        return 0
+    model = (model or "").lower()
+    ratio = next((r for family, r in CHARS_PER_TOKEN if family in model), DEFAULT_CHARS_PER_TOKEN)
+    return math.ceil(len(text) / ratio)
+
+def count_message_tokens(message: Dict[str, str], model: str = "") -> int:
+    return count_tokens(message.get("content", ""), model) + MESSAGE_OVERHEAD_TOKENS
+
+def summary_message(summary: str) -> Dict[str, str]:
+    return {"role": "system", "content": SUMMARY_PREFIX + summary}
+
+def clean_history(history: Optional[List[Dict[str, str]]], system_prompt: str, user_message: str) -> List[Dict[str, str]]:
+    """
+    Normalize caller-supplied history before it is packed:
+
+    - drop unknown roles, empty turns and copies of the system prompt
+    - drop immediate repeats of the same turn
+    - drop a trailing user turn that repeats the message being sent, so the
+      current turn is only added once
+    """
+    cleaned: List[Dict[str, str]] = []
+    for turn in history or []:
+        role = turn.get("role")
+        content = turn.get("content") or ""
+        if role not in ("user", "assistant", "system") or not content.strip():
+            continue
+        if role == "system" and content == system_prompt:
+            continue
+        if cleaned and cleaned[-1]["role"] == role and cleaned[-1]["content"] == content:
+            continue
+        cleaned.append({"role": role, "content": content})
+    if cleaned and cleaned[-1]["role"] == "user" and cleaned[-1]["content"].strip() == user_message.strip():
+        cleaned.pop()
+    return cleaned
+
+class ContextBuilder:
+    """
+    Packs conversation turns into a token budget, newest first.
+
+    Turns that no longer fit are meant to be folded into a rolling summary;
+    `turns_to_fold` starts doing that once the history reaches
+    `summary_trigger_ratio` of the budget, so the summary is up to date
+    before anything actually has to be dropped.
+    """
+    def __init__(self, model: str, token_budget: int, summary_trigger_ratio: float = 0.75):
+        self.model = model
+        self.token_budget = token_budget
+        self.summary_trigger_ratio = summary_trigger_ratio
+
+    def tokens(self, turns: List[Dict[str, str]]) -> int:
+        return sum(count_message_tokens(turn, self.model) for turn in turns)
+
+    def pack(self, turns: List[Dict[str, str]], budget: Optional[int] = None) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+        """
+        Split chronological `turns` into (dropped, kept): the newest turns
+        that fit in the budget are kept, everything older is dropped
+        """
+        budget = self.token_budget if budget is None else budget
+        used = 0
+        start = len(turns)
+        for index in range(len(turns) - 1, -1, -1):
+            cost = count_message_tokens(turns[index], self.model)
+            if used + cost > budget:
+                break
+            used += cost
+            start = index
+        return turns[:start], turns[start:]
+
+    def build(self, turns: List[Dict[str, str]], summary: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        History to send upstream: the rolling summary (if any) followed by
+        the newest turns that fit in what's left of the budget
+        """
+        prefix = [summary_message(summary)] if summary else []
+        _, kept = self.pack(turns, self.token_budget - self.tokens(prefix))
+        return prefix + kept
+
+    def fit(self, history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Trim an already assembled history to the budget, keeping its leading
+        system messages (e.g. a rolling summary) pinned
+        """
+        pinned = 0
+        while pinned < len(history) and history[pinned].get("role") == "system":
+            pinned += 1
+        prefix = history[:pinned]
+        _, kept = self.pack(history[pinned:], self.token_budget - self.tokens(prefix))
+        return prefix + kept
+
+    def assemble(self, system_prompt: str, history: Optional[List[Dict[str, str]]], user_message: str) -> List[Dict[str, str]]:
+        """
+        The one place a request's messages array is put together: system
+        prompt, cleaned history trimmed to the budget, then the user turn
+        """
+        fitted = self.fit(clean_history(history, system_prompt, user_message))
+        return (
+            [{"role": "system", "content": system_prompt}]
+            + fitted
+            + [{"role": "user", "content": user_message}]
+        )
+
+    def turns_to_fold(self, turns: List[Dict[str, str]], newer_follow: bool = False) -> List[Dict[str, str]]:
+        """
+        Oldest turns to move into the summary, empty while under the trigger.
+        With `newer_follow` the turns are only the start of a longer backlog:
+        all of them are older than what the next request sends, so fold as
+        many as one summary pass takes (at least one).
+        """
+        trigger = int(self.token_budget * self.summary_trigger_ratio)
+        if newer_follow:
+            fold, used = [], 0
+            for turn in turns:
+                used += count_message_tokens(turn, self.model)
+                if fold and used > trigger:
+                    break
+                fold.append(turn)
+            return fold
+        if self.tokens(turns) <= trigger:
+            return []
+        dropped, _ = self.pack(turns, trigger // 2)
+        return dropped
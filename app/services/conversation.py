@@ -0,0 +1,226 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Text, bindparam, func, select, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..models import Chat, Message
+from .ai_service import ai_service
+from .search import index_messages
+from ..utils.compression import decode_text, encode_text, resolve_codec
+
+# Upper bound on not-yet-summarized messages loaded for one turn, or for
+# one summary pass
+MAX_UNSUMMARIZED_MESSAGES = 200
+
+# Characters of the last message kept on the chat for the sidebar
+PREVIEW_LENGTH = 120
+
+# Chats with a summary refresh in progress on this worker
+_summarizing = set()
+
+def message_preview(content: str) -> str:
+    text = " ".join((content or "").split())
+    if len(text) <= PREVIEW_LENGTH:
+        return text
+    return text[:PREVIEW_LENGTH - 1].rstrip() + "\u2026"
+
+async def add_messages(db: AsyncSession, chat_id: int, *messages: Message):
+    """
+    Write messages to a chat. Always go through here: the search index and
+    the chat's sidebar columns (count, last activity, preview) are updated
+    in the same transaction. The caller commits.
+    """
+    now = datetime.utcnow()
+    db.add_all(messages)
+    # Ids are needed for the search index
+    await db.flush()
+    await index_messages(db, messages)
+    await db.execute(
+        update(Chat)
+        .where(Chat.id == chat_id)
+        .values(
+            message_count=Chat.message_count + len(messages),
+            last_message_at=now,
+            last_message_preview=message_preview(messages[-1].content),
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def _as_turn(message: Message) -> Dict[str, str]:
+    return {"role": message.role, "content": message.content}
+
+def _unsummarized_query(chat: Chat):
+    query = select(Message).where(Message.chat_id == chat.id)
+    if chat.summary_message_id:
+        query = query.where(Message.id > chat.summary_message_id)
+    return query
+
+async def _unsummarized_messages(db: AsyncSession, chat: Chat) -> List[Message]:
+    """The newest unsummarized messages, oldest first"""
+    result = await db.execute(
+        _unsummarized_query(chat).order_by(Message.id.desc()).limit(MAX_UNSUMMARIZED_MESSAGES)
+    )
+    return list(reversed(result.scalars().all()))
+
+async def _summary_backlog(db: AsyncSession, chat: Chat) -> Tuple[List[Message], bool]:
+    """
+    The oldest unsummarized messages, in order, and whether more follow.
+    Summaries must start here: a chat can have more unsummarized messages
+    than one load (chats from before summaries existed, imported chats),
+    and anything between the summary and the newest window would be lost.
+    """
+    result = await db.execute(
+        _unsummarized_query(chat).order_by(Message.id).limit(MAX_UNSUMMARIZED_MESSAGES + 1)
+    )
+    messages = list(result.scalars().all())
+    return messages[:MAX_UNSUMMARIZED_MESSAGES], len(messages) > MAX_UNSUMMARIZED_MESSAGES
+
+async def load_chat_history(db: AsyncSession, chat: Chat) -> List[Dict[str, str]]:
+    """
+    Conversation history for the next turn: the chat's rolling summary
+    followed by the newest messages that fit the token budget
+    """
+    turns = [_as_turn(message) for message in await _unsummarized_messages(db, chat)]
+    return ai_service.context_builder().build(turns, chat.context_summary)
+
+async def refresh_chat_summary(chat_id: int):
+    """
+    Fold the oldest unsummarized turns into the chat's summary once they
+    approach the token budget, one pass after another until the rest fits.
+    Runs after the response has been sent.
+    """
+    if chat_id in _summarizing:
+        return
+    _summarizing.add(chat_id)
+    try:
+        async with AsyncSessionLocal() as db:
+            chat = await db.get(Chat, chat_id)
+            if not chat or chat.deleted_at:
+                return
+            while True:
+                messages, newer_follow = await _summary_backlog(db, chat)
+                fold = ai_service.context_builder().turns_to_fold(
+                    [_as_turn(message) for message in messages], newer_follow
+                )
+                if not fold:
+                    return
+                # Don't hold a pooled connection while the model writes the summary
+                await db.commit()
+
+                summary = await ai_service.summarize_conversation(chat.context_summary, fold)
+                if summary is None:
+                    return
+                chat.context_summary = summary
+                chat.summary_message_id = messages[len(fold) - 1].id
+                await db.commit()
+    except Exception as e:
+        print(f"Error refreshing summary for chat {chat_id}: {e}")
+    finally:
+        _summarizing.discard(chat_id)
+
+async def backfill_chat_stats(batch_size: int = 500) -> int:
+    """
+    Recompute every chat's sidebar columns from its messages, one batch of
+    chats per transaction. Archived chats keep theirs, their messages are
+    in chat_archives. Safe to re-run. Returns the number of chats.
+    """
+    chats = Chat.__table__
+    write = (
+        update(chats)
+        .where(chats.c.id == bindparam("chat_id"))
+        .values(
+            message_count=bindparam("count"),
+            last_message_at=bindparam("last_at"),
+            last_message_preview=bindparam("preview"),
+            # Bare UPDATEs would otherwise apply updated_at's onupdate and reorder the sidebar
+            updated_at=chats.c.updated_at
+        )
+    )
+    total = 0
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Chat.id)
+                .where(Chat.id > last_id, Chat.archived_at.is_(None))
+                .order_by(Chat.id)
+                .limit(batch_size)
+            )
+            chat_ids = list(result.scalars().all())
+            if not chat_ids:
+                return total
+
+            latest = (
+                select(Message.chat_id, func.count().label("count"), func.max(Message.id).label("last_id"))
+                .where(Message.chat_id.in_(chat_ids))
+                .group_by(Message.chat_id)
+                .subquery()
+            )
+            result = await db.execute(
+                select(latest.c.chat_id, latest.c.count, Message.created_at, Message.content)
+                .join(Message, Message.id == latest.c.last_id)
+            )
+            stats = {row.chat_id: row for row in result}
+
+            await db.execute(write, [
+                {
+                    "chat_id": chat_id,
+                    "count": stats[chat_id].count if chat_id in stats else 0,
+                    "last_at": stats[chat_id].created_at if chat_id in stats else None,
+                    "preview": message_preview(stats[chat_id].content) if chat_id in stats else None,
+                }
+                for chat_id in chat_ids
+            ])
+            await db.commit()
+
+        total += len(chat_ids)
+        last_id = chat_ids[-1]
+        print(f"Backfilled chat stats for {total} chats")
+
+async def recompress_messages(batch_size: int = 500, decompress: bool = False) -> int:
+    """
+    Rewrite stored message bodies with the current compression settings
+    (or back to plain text with `decompress`), one batch of messages per
+    transaction. Safe to re-run and to interrupt. Returns rows rewritten.
+    """
+    messages = Message.__table__
+    # Raw stored values, bypassing CompressedText's decoding
+    stored_content = type_coerce(messages.c.content, Text)
+    write = (
+        update(messages)
+        .where(messages.c.id == bindparam("message_id"))
+        .values(content=type_coerce(bindparam("body"), Text))
+    )
+    codec = resolve_codec(settings.MESSAGE_COMPRESSION_CODEC)
+    threshold = 0 if decompress else settings.MESSAGE_COMPRESSION_THRESHOLD_BYTES
+
+    rewritten = 0
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(messages.c.id, stored_content)
+                .where(messages.c.id > last_id)
+                .order_by(messages.c.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return rewritten
+
+            changes = []
+            for message_id, stored in rows:
+                body = encode_text(decode_text(stored), threshold, codec)
+                if body != stored:
+                    changes.append({"message_id": message_id, "body": body})
+            if changes:
+                await db.execute(write, changes)
+                await db.commit()
+
+        rewritten += len(changes)
+        last_id = rows[-1][0]
+        print(f"Scanned messages up to id {last_id}, rewrote {rewritten}")
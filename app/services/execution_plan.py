@@ -0,0 +1,74 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+# A step receives the results of the steps finished so far (its
+# dependencies are guaranteed to be among them) and returns an awaitable
+StepFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+class PlanStep:
+    def __init__(self, name: str, fn: StepFn, depends_on: Sequence[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.depends_on = list(depends_on)
+
+class PlanResult:
+    def __init__(self, results: Dict[str, Any], timings: Dict[str, float], total_ms: float):
+        self.results = results
+        self.timings = timings
+        self.total_ms = total_ms
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+    def timings_report(self) -> Dict[str, float]:
+        """Per-step wall time in milliseconds, plus the whole plan as `total`"""
+        return {**self.timings, "total": self.total_ms}
+
+class ExecutionPlan:
+    """
+    Declare sub-generations and their dependencies, then run them with as
+    much concurrency as the dependency graph allows.
+
+    Steps can only depend on steps added before them, which keeps the
+    graph acyclic by construction.
+    """
+    def __init__(self):
+        self.steps: Dict[str, PlanStep] = {}
+
+    def add(self, name: str, fn: StepFn, depends_on: Optional[List[str]] = None) -> "ExecutionPlan":
+        if name in self.steps:
+            raise ValueError(f"Duplicate plan step: {name}")
+        for dependency in depends_on or []:
+            if dependency not in self.steps:
+                raise ValueError(f"Plan step '{name}' depends on unknown step '{dependency}'")
+        self.steps[name] = PlanStep(name, fn, depends_on or [])
+        return self
+
+    async def run(self) -> PlanResult:
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        started_at = time.perf_counter()
+
+        async def run_step(step: PlanStep):
+            if step.depends_on:
+                await asyncio.gather(*(tasks[name] for name in step.depends_on))
+            step_started = time.perf_counter()
+            results[step.name] = await step.fn(results)
+            timings[step.name] = round((time.perf_counter() - step_started) * 1000, 1)
+
+        for step in self.steps.values():
+            tasks[step.name] = asyncio.ensure_future(run_step(step))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            # One failed step fails the plan, don't leave siblings running
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        total_ms = round((time.perf_counter() - started_at) * 1000, 1)
+        return PlanResult(results, timings, total_ms)
@@ -0,0 +1,170 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401 - HTTP/2 support for httpx is optional
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from ..config import settings
+
+class FirstByteTimeout(httpx.TimeoutException):
+    """The provider accepted the request but sent no response headers in time"""
+
+class ProviderClient:
+    """
+    Dedicated connection pool for one AI provider.
+
+    Timeouts are split into connect, read (between body chunks) and
+    first-byte (until response headers arrive). The pool is opened and
+    closed by the application lifespan; use outside of it opens lazily.
+    """
+    def __init__(
+        self,
+        name: str,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        connect_timeout: float,
+        read_timeout: float,
+        first_byte_timeout: float,
+        http2: bool = False
+    ):
+        self.name = name
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=read_timeout,
+            pool=connect_timeout
+        )
+        self.first_byte_timeout = first_byte_timeout
+        if http2 and not HTTP2_AVAILABLE:
+            print(f"HTTP/2 requested for {name} but the 'h2' package is not installed, using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.in_flight = 0
+        self.first_byte_timeouts = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self.open()
+        return self._client
+
+    def open(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2
+            )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        request = self.client.build_request(method, url, **kwargs)
+        try:
+            return await asyncio.wait_for(
+                self.client.send(request, stream=True),
+                timeout=self.first_byte_timeout
+            )
+        except asyncio.TimeoutError:
+            self.first_byte_timeouts += 1
+            raise FirstByteTimeout(
+                f"{self.name}: no response within {self.first_byte_timeout}s", request=request
+            )
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request and read the whole body"""
+        self.requests += 1
+        self.in_flight += 1
+        try:
+            response = await self._send(method, url, **kwargs)
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+            return response
+        finally:
+            self.in_flight -= 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Send a request and yield the response once its headers arrive"""
+        self.requests += 1
+        self.in_flight += 1
+        try:
+            response = await self._send(method, url, **kwargs)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        connections = []
+        queued = 0
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        if pool is not None:
+            connections = list(getattr(pool, "connections", []))
+            queued = sum(1 for request in getattr(pool, "_requests", []) if request.is_queued())
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "connections": len(connections),
+            "active_connections": len(connections) - idle,
+            "idle_connections": idle,
+            "queued_requests": queued,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "first_byte_timeouts": self.first_byte_timeouts,
+        }
+
+def create_provider_clients() -> Dict[str, ProviderClient]:
+    """Build one pool per provider from application settings"""
+    return {
+        "ollama": ProviderClient(
+            "ollama",
+            max_connections=settings.OLLAMA_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OLLAMA_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            connect_timeout=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+            read_timeout=settings.HTTP_READ_TIMEOUT_SECONDS,
+            first_byte_timeout=settings.OLLAMA_FIRST_BYTE_TIMEOUT_SECONDS
+        ),
+        "digitalocean": ProviderClient(
+            "digitalocean",
+            max_connections=settings.DIGITALOCEAN_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.DIGITALOCEAN_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            connect_timeout=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+            read_timeout=settings.HTTP_READ_TIMEOUT_SECONDS,
+            first_byte_timeout=settings.DIGITALOCEAN_FIRST_BYTE_TIMEOUT_SECONDS,
+            http2=settings.DIGITALOCEAN_HTTP2
+        ),
+    }
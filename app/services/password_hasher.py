@@ -0,0 +1,84 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from ..config import settings
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashes are already queued"""
+
+class PasswordHasher:
+    """
+    bcrypt hashing and verification on a small dedicated thread pool.
+
+    Each call costs 100-300 ms of CPU at the default cost factor; run
+    inline it would stall every other request on the worker, streams
+    included. bcrypt releases the GIL, so the pool runs them in parallel
+    with the event loop. At most `max_workers + max_queue` calls are
+    admitted, more raise PasswordHasherBusy instead of queueing forever.
+    """
+    def __init__(self, rounds: int, max_workers: int, max_queue: int):
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy("Too many logins in progress, try again shortly")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check `password` against `hashed_password`. When it matches but was
+        hashed with other settings (e.g. an older BCRYPT_ROUNDS), also
+        returns the replacement hash to store.
+        """
+        valid, new_hash = await self._run(self.context.verify_and_update, password, hashed_password)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rounds": self.rounds,
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+password_hasher = PasswordHasher(
+    settings.BCRYPT_ROUNDS,
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_MAX_QUEUE
+)
@@ -0,0 +1,207 @@
+import html
+import re
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ArchivedMessage, Chat, ChatArchive, Message
+from .archive_format import archived_messages
+
+# Full-text search over message history.
+#
+# SQLite indexes each message in the contentless `messages_fts` FTS5 table,
+# PostgreSQL a `message_search` row with its tsvector behind a GIN index
+# (see migration 0007 and SEARCH_INDEX_DDL in app.models). Both are written
+# by the application when messages are added, from the plain text, so the
+# index doesn't depend on how `messages.content` is stored. Deleting a
+# message removes its entry (triggers), except when its chat is archived:
+# the entry stays, archived_messages says which archive to read the hit
+# from, and the entry goes with that archive.
+
+# Dialects with a full-text index (SEARCH_INDEX_DDL in app.models)
+SEARCH_DIALECTS = ("sqlite", "postgresql")
+
+# No stemming: messages mix English, Swahili and code
+TEXT_SEARCH_CONFIG = "simple"
+
+# Words of context on each side of the first hit in a snippet
+SNIPPET_CONTEXT_WORDS = 12
+
+_WORD = re.compile(r"\w+")
+
+class SearchUnavailable(Exception):
+    """The database has no full-text index (not one of SEARCH_DIALECTS)"""
+
+def query_terms(query: str) -> List[str]:
+    """Lowercased search terms; every term must match (as a word prefix)"""
+    return list(dict.fromkeys(_WORD.findall(query.lower())))
+
+async def index_messages(db: AsyncSession, messages: Sequence[Message]):
+    """Add flushed messages to the search index, in the caller's transaction"""
+    await index_message_rows(db, [{"id": message.id, "content": message.content} for message in messages])
+
+async def index_message_rows(db: AsyncSession, rows: List[Dict]):
+    """index_messages for inserted rows given as {"id": ..., "content": ...} dicts"""
+    if not rows:
+        return
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        await db.execute(text("INSERT INTO messages_fts (rowid, content) VALUES (:id, :content)"), rows)
+    elif dialect == "postgresql":
+        await db.execute(
+            text(
+                "INSERT INTO message_search (message_id, document) "
+                f"VALUES (:id, to_tsvector('{TEXT_SEARCH_CONFIG}', :content))"
+            ),
+            rows
+        )
+
+def _match_sql(dialect: str) -> str:
+    if dialect == "sqlite":
+        # bm25() is lower for better matches
+        return """
+            SELECT messages_fts.rowid AS id, -bm25(messages_fts) AS score
+            FROM messages_fts
+            LEFT JOIN messages ON messages.id = messages_fts.rowid
+            LEFT JOIN archived_messages ON archived_messages.message_id = messages_fts.rowid
+            JOIN chats ON chats.id = COALESCE(messages.chat_id, archived_messages.chat_id)
+            WHERE messages_fts MATCH :query
+              AND chats.user_id = :user_id AND chats.deleted_at IS NULL
+            ORDER BY score DESC, messages_fts.rowid DESC
+            LIMIT :limit OFFSET :offset
+        """
+    return f"""
+        SELECT message_search.message_id AS id, ts_rank_cd(message_search.document, query) AS score
+        FROM message_search
+        CROSS JOIN to_tsquery('{TEXT_SEARCH_CONFIG}', :query) AS query
+        LEFT JOIN messages ON messages.id = message_search.message_id
+        LEFT JOIN archived_messages ON archived_messages.message_id = message_search.message_id
+        JOIN chats ON chats.id = COALESCE(messages.chat_id, archived_messages.chat_id)
+        WHERE message_search.document @@ query
+          AND chats.user_id = :user_id AND chats.deleted_at IS NULL
+        ORDER BY score DESC, message_search.message_id DESC
+        LIMIT :limit OFFSET :offset
+    """
+
+def _match_query(terms: List[str], dialect: str) -> str:
+    if dialect == "sqlite":
+        return " ".join(f'"{term}"*' for term in terms)
+    return " & ".join(f"{term}:*" for term in terms)
+
+def highlight(content: str, terms: List[str], context_words: int = SNIPPET_CONTEXT_WORDS) -> str:
+    """
+    HTML snippet around the first matching word, with matches wrapped in
+    <mark>. Everything else is escaped.
+    """
+    def matches(word: str) -> bool:
+        word = word.lower()
+        return any(word.startswith(term) for term in terms)
+
+    words = list(_WORD.finditer(content))
+    if not words:
+        return html.escape(" ".join(content.split()))
+    first = next((index for index, word in enumerate(words) if matches(word.group())), 0)
+    start = max(0, first - context_words)
+    end = min(len(words), start + 2 * context_words + 1)
+    char_start = words[start].start() if start > 0 else 0
+    char_end = words[end - 1].end() if end < len(words) else len(content)
+
+    parts = []
+    position = char_start
+    for word in words[start:end]:
+        parts.append(html.escape(content[position:word.start()]))
+        escaped = html.escape(word.group())
+        parts.append(f"<mark>{escaped}</mark>" if matches(word.group()) else escaped)
+        position = word.end()
+    parts.append(html.escape(content[position:char_end]))
+
+    snippet = " ".join("".join(parts).split())
+    if char_start > 0:
+        snippet = "…" + snippet
+    if char_end < len(content):
+        snippet += "…"
+    return snippet
+
+async def _archived_hits(db: AsyncSession, message_ids: List[int]) -> Dict[int, Tuple]:
+    """Hits on archived messages, read back from their chats' archives"""
+    result = await db.execute(
+        select(ChatArchive.chat_id, ChatArchive.payload, ChatArchive.codec, Chat.title)
+        .join(Chat, Chat.id == ChatArchive.chat_id)
+        .where(ChatArchive.chat_id.in_(
+            select(ArchivedMessage.chat_id).where(ArchivedMessage.message_id.in_(message_ids))
+        ))
+    )
+    wanted = set(message_ids)
+    found = {}
+    for archive in result.all():
+        for document in archived_messages(archive.payload, archive.codec):
+            if document["id"] in wanted:
+                created_at = document.get("created_at")
+                found[document["id"]] = (
+                    archive.chat_id,
+                    archive.title,
+                    document["role"],
+                    document["content"],
+                    datetime.fromisoformat(created_at) if created_at else None
+                )
+    return found
+
+async def search_messages(
+    db: AsyncSession,
+    user_id: int,
+    query: str,
+    limit: int,
+    offset: int = 0
+) -> Tuple[List[Dict], bool]:
+    """
+    Rank the user's messages against `query`. Returns one page of hits
+    (best first) and whether more follow. Raises SearchUnavailable on a
+    database without a full-text index.
+    """
+    dialect = db.bind.dialect.name
+    if dialect not in SEARCH_DIALECTS:
+        raise SearchUnavailable(f"Full-text search is not available for {dialect}")
+    terms = query_terms(query)
+    if not terms:
+        return [], False
+
+    result = await db.execute(
+        text(_match_sql(dialect)),
+        {"query": _match_query(terms, dialect), "user_id": user_id, "limit": limit + 1, "offset": offset}
+    )
+    ranked = result.all()
+    has_more = len(ranked) > limit
+    scores = {row.id: row.score for row in ranked[:limit]}
+    if not scores:
+        return [], False
+
+    result = await db.execute(
+        select(Message, Chat.title).join(Chat, Chat.id == Message.chat_id).where(Message.id.in_(scores))
+    )
+    found = {
+        message.id: (message.chat_id, title, message.role, message.content, message.created_at)
+        for message, title in result.all()
+    }
+    missing = [message_id for message_id in scores if message_id not in found]
+    if missing:
+        found.update(await _archived_hits(db, missing))
+
+    hits = []
+    for message_id, score in scores.items():
+        if message_id not in found:
+            # Deleted (or its chat restored) since it was ranked
+            continue
+        chat_id, title, role, content, created_at = found[message_id]
+        hits.append({
+            "message_id": message_id,
+            "chat_id": chat_id,
+            "chat_title": title,
+            "role": role,
+            "snippet": highlight(content, terms),
+            "created_at": created_at,
+            # Unrounded: bm25 scores on a small index are tiny
+            "score": float(score),
+        })
+    return hits, has_more
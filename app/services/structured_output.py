@@ -0,0 +1,59 @@
+import json
+import re
+from typing import Dict, Optional
+
+def build_structured_prompt(task: str, fields: Dict[str, str]) -> str:
+    """
+    Ask for every response field in a single JSON object
+    """
+    field_lines = "\n".join(f'- "{name}": {description}' for name, description in fields.items())
+    return f"""{task}
+
+Respond with a single JSON object and nothing else. It must contain exactly these string fields:
+{field_lines}
+
+Put code inside the JSON strings (escape newlines and quotes), do not wrap the JSON in markdown."""
+
+def _as_text(value) -> str:
+    if isinstance(value, str):
+        return value.strip()
+    return json.dumps(value, indent=2)
+
+def _parse_json(text: str, fields: Dict[str, str]) -> Optional[Dict[str, str]]:
+    # Models often wrap the object in a ```json fence or add a preamble
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    if any(not data.get(name) for name in fields):
+        return None
+    return {name: _as_text(data[name]) for name in fields}
+
+def _parse_sections(text: str, fields: Dict[str, str]) -> Optional[Dict[str, str]]:
+    # Fallback for models that ignore the JSON instruction and answer with
+    # one markdown heading per field, e.g. "## explanation"
+    names = "|".join(re.escape(name) for name in fields)
+    heading = re.compile(rf"^\s*#+\s*\**\s*({names})\s*\**\s*:?\s*$", re.IGNORECASE | re.MULTILINE)
+    matches = list(heading.finditer(text))
+    sections = {}
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+        sections[match.group(1).lower()] = text[match.end():end].strip()
+    if any(not sections.get(name.lower()) for name in fields):
+        return None
+    return {name: sections[name.lower()] for name in fields}
+
+def parse_structured_response(text: str, fields: Dict[str, str]) -> Optional[Dict[str, str]]:
+    """
+    Parse a structured answer into {field: text}. Returns None when any field
+    is missing so callers can fall back to one call per field.
+    """
+    if not text:
+        return None
+    return _parse_json(text, fields) or _parse_sections(text, fields)
@@ -0,0 +1,78 @@
+import base64
+import zlib
+from typing import Optional
+
+try:
+    import zstandard  # Optional, zlib is used when it's missing
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Stored bodies that start with MARKER carry a format tag:
+#   "\x1fzstd:<base64>"  zstd-compressed UTF-8
+#   "\x1fzlib:<base64>"  zlib-compressed UTF-8
+#   "\x1fraw:<text>"     plain text that happened to start with MARKER
+# Anything else is plain text, so rows written before compression (or
+# below the threshold) read back unchanged.
+MARKER = "\x1f"
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 6
+
+def _zstd_compress(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+def _zstd_decompress(data: bytes) -> bytes:
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError("A message is zstd-compressed but the 'zstandard' package is not installed")
+    return zstandard.ZstdDecompressor().decompress(data)
+
+CODECS = {
+    "zstd": (_zstd_compress, _zstd_decompress),
+    "zlib": (lambda data: zlib.compress(data, ZLIB_LEVEL), zlib.decompress),
+}
+
+def resolve_codec(codec: str) -> str:
+    if codec == "zstd" and not ZSTD_AVAILABLE:
+        print("zstd compression requested but the 'zstandard' package is not installed, using zlib")
+        return "zlib"
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression codec: {codec}")
+    return codec
+
+def compress_bytes(data: bytes, codec: str) -> bytes:
+    return CODECS[codec][0](data)
+
+def decompress_bytes(data: bytes, codec: str) -> bytes:
+    return CODECS[codec][1](data)
+
+def is_compressed(stored: Optional[str]) -> bool:
+    return bool(stored) and stored.startswith(MARKER) and not stored.startswith(MARKER + "raw:")
+
+def encode_text(value: Optional[str], threshold: int, codec: str) -> Optional[str]:
+    """
+    Text as it should be stored: compressed and tagged when it is at least
+    `threshold` UTF-8 bytes (0 disables) and compression actually saves space
+    """
+    if value is None:
+        return None
+    data = value.encode("utf-8")
+    if threshold and len(data) >= threshold:
+        compressed = CODECS[codec][0](data)
+        stored = f"{MARKER}{codec}:{base64.b64encode(compressed).decode('ascii')}"
+        if len(stored) < len(data):
+            return stored
+    if value.startswith(MARKER):
+        return f"{MARKER}raw:{value}"
+    return value
+
+def decode_text(stored: Optional[str]) -> Optional[str]:
+    """Inverse of encode_text; plain text passes through"""
+    if not stored or not stored.startswith(MARKER):
+        return stored
+    tag, _, payload = stored[1:].partition(":")
+    if tag == "raw":
+        return payload
+    if tag not in CODECS:
+        # Not one of ours, leave it alone
+        return stored
+    return CODECS[tag][1](base64.b64decode(payload)).decode("utf-8")
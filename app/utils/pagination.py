@@ -0,0 +1,112 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import String, and_, or_, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+class InvalidCursor(ValueError):
+    """A pagination cursor that wasn't issued by this API"""
+
+class Page:
+    """
+    One keyset page. `items` are in ascending key order; `before` and
+    `after` are cursors for the neighbouring pages, None when there are none.
+    """
+    def __init__(self, items: List[Any], before: Optional[str], after: Optional[str]):
+        self.items = items
+        self.before = before
+        self.after = after
+
+    def headers(self):
+        headers = {}
+        if self.before:
+            headers["X-Before-Cursor"] = self.before
+        if self.after:
+            headers["X-After-Cursor"] = self.after
+        return headers
+
+def encode_cursor(timestamp: Optional[datetime], row_id: int) -> str:
+    payload = json.dumps([timestamp.isoformat() if timestamp else None, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid pagination cursor")
+
+def _beyond_cursor(timestamp_column, id_column, timestamp: datetime, row_id: int, newer: bool, dialect: str):
+    """Rows strictly newer (or older) than the cursor in (timestamp, id) order"""
+    if dialect != "sqlite":
+        key = tuple_(timestamp_column, id_column)
+        bound = tuple_(timestamp, row_id)
+        return key > bound if newer else key < bound
+
+    # SQLite keeps timestamps as text in two spellings: server defaults have
+    # no fractional part ("2024-01-01 10:00:00"), values written by
+    # SQLAlchemy always do ("2024-01-01 10:00:00.000000"). Compare as text
+    # and treat both spellings of the cursor's instant as equal.
+    column = type_coerce(timestamp_column, String)
+    spellings = [timestamp.isoformat(sep=" ", timespec="microseconds")]
+    if not timestamp.microsecond:
+        spellings.insert(0, timestamp.isoformat(sep=" ", timespec="seconds"))
+    same_instant = column.in_(spellings)
+    if newer:
+        return or_(column > spellings[-1], and_(same_instant, id_column > row_id))
+    return or_(column < spellings[0], and_(same_instant, id_column < row_id))
+
+async def keyset_page(
+    db: AsyncSession,
+    query: Select,
+    timestamp_column,
+    id_column,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None
+) -> Page:
+    """
+    Fetch `limit` rows of `query` around a cursor on (timestamp, id).
+
+    Without a cursor this is the newest page. `before` pages towards older
+    rows and `after` towards newer ones; only one of them may be given.
+    """
+    if before and after:
+        raise InvalidCursor("Pass either 'before' or 'after', not both")
+
+    cursor = before or after
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.where(
+            _beyond_cursor(timestamp_column, id_column, timestamp, row_id, bool(after), db.bind.dialect.name)
+        )
+
+    if after:
+        query = query.order_by(timestamp_column.asc(), id_column.asc())
+    else:
+        query = query.order_by(timestamp_column.desc(), id_column.desc())
+
+    result = await db.execute(query.limit(limit + 1))
+    rows = list(result.scalars().all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not after:
+        rows.reverse()
+    if not rows:
+        return Page([], None, None)
+
+    def cursor_of(row):
+        return encode_cursor(getattr(row, timestamp_column.key), getattr(row, id_column.key))
+
+    # Arriving from one side means rows exist on that side
+    older = has_more if not after else True
+    newer = has_more if after else bool(before)
+    return Page(
+        rows,
+        cursor_of(rows[0]) if older else None,
+        cursor_of(rows[-1]) if newer else None
+    )
@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+from typing import List
+
+from sqlalchemy import event
+
+class QueryCounter:
+    """
+    Records the SQL statements an engine executes while active.
+    Accepts a sync Engine or an AsyncEngine.
+
+        with QueryCounter(engine) as queries:
+            client.get("/api/chat/")
+        print(queries.count, queries.statements)
+    """
+    def __init__(self, engine):
+        self.engine = getattr(engine, "sync_engine", engine)
+        self.statements: List[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+@contextmanager
+def assert_query_count(engine, expected: int):
+    """Fail unless the block executes exactly `expected` SQL statements"""
+    with QueryCounter(engine) as queries:
+        yield queries
+    if queries.count != expected:
+        listing = "\n".join(f"  {index + 1}. {' '.join(sql.split())}" for index, sql in enumerate(queries.statements))
+        raise AssertionError(f"Expected {expected} SQL statements, executed {queries.count}:\n{listing}")
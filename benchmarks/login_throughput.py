@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Login throughput and event-loop stalls, bcrypt inline vs on the pool.
+
+Simulates a worker serving streaming chats (tasks that each expect to
+send a token every few milliseconds) while a burst of logins verifies
+passwords. With bcrypt called inline every verification freezes the
+loop, which shows up as late stream ticks; on the password_hasher pool
+the streams keep their cadence. Run from the project root:
+
+    python benchmarks/login_throughput.py [--rounds 12] [--logins 40] [--streams 50]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.password_hasher import PasswordHasher
+
+PASSWORD = "correct horse battery staple"
+
+async def stream(tick: float, stop: asyncio.Event, lateness: list):
+    """A chat stream sending a token every `tick` seconds, recording how late each one is"""
+    expected = time.perf_counter() + tick
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, expected - time.perf_counter()))
+        lateness.append(time.perf_counter() - expected)
+        expected += tick
+
+async def run(mode: str, hasher: PasswordHasher, hashed: str, logins: int, concurrency: int, streams: int, tick: float):
+    stop = asyncio.Event()
+    lateness: list = []
+    stream_tasks = [asyncio.create_task(stream(tick, stop, lateness)) for _ in range(streams)]
+    await asyncio.sleep(0.2)  # Let the streams settle
+    lateness.clear()
+
+    limit = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with limit:
+            if mode == "inline":
+                assert hasher.context.verify(PASSWORD, hashed)
+            else:
+                valid, _ = await hasher.verify(PASSWORD, hashed)
+                assert valid
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await asyncio.gather(*stream_tasks)
+    lateness_ms = sorted(value * 1000 for value in lateness)
+    p99 = lateness_ms[int(len(lateness_ms) * 0.99)] if lateness_ms else 0.0
+    return logins / elapsed, statistics.median(lateness_ms) if lateness_ms else 0.0, p99, max(lateness_ms, default=0.0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--logins", type=int, default=40, help="Logins in the burst")
+    parser.add_argument("--concurrency", type=int, default=20, help="Logins in flight at once")
+    parser.add_argument("--streams", type=int, default=50, help="Concurrent chat streams")
+    parser.add_argument("--tick-ms", type=float, default=20.0, help="Interval between a stream's tokens")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Pool sizes to measure")
+    args = parser.parse_args()
+
+    reference = PasswordHasher(args.rounds, 1, 0)
+    hashed = reference.context.hash(PASSWORD)
+    started = time.perf_counter()
+    reference.context.verify(PASSWORD, hashed)
+    print(f"bcrypt rounds {args.rounds}: {(time.perf_counter() - started) * 1000:.0f} ms per verify, "
+          f"{args.streams} streams ticking every {args.tick_ms:g} ms, {args.logins} logins\n")
+
+    header = f"{'mode':>10} {'logins/s':>9} {'tick late p50 ms':>17} {'p99 ms':>8} {'max ms':>8}"
+    print(header)
+    print("-" * len(header))
+    runs = [("inline", 1)] + [("pool", workers) for workers in args.workers]
+    for mode, workers in runs:
+        hasher = PasswordHasher(args.rounds, workers, args.logins)
+        throughput, p50, p99, worst = asyncio.run(
+            run(mode, hasher, hashed, args.logins, args.concurrency, args.streams, args.tick_ms / 1000)
+        )
+        hasher.shutdown()
+        label = mode if mode == "inline" else f"pool x{workers}"
+        print(f"{label:>10} {throughput:>9.1f} {p50:>17.1f} {p99:>8.1f} {worst:>8.1f}")
+
+if __name__ == "__main__":
+    main()
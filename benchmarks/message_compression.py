@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Storage saved vs CPU added by message compression.
+
+Builds message-sized bodies from the repository's own docs and source
+(prose, markdown and code, like assistant replies), stores them the way
+the `messages.content` column does, and times decoding them on read.
+Run from the project root:
+
+    python benchmarks/message_compression.py [--threshold 2048] [--sizes 1024 4096 16384]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.compression import ZSTD_AVAILABLE, decode_text, encode_text
+
+ROOT = Path(__file__).resolve().parent.parent
+CORPUS_GLOBS = ["*.md", "app/**/*.py", "frontend/src/**/*.tsx"]
+
+def load_corpus() -> str:
+    parts = []
+    for pattern in CORPUS_GLOBS:
+        for path in sorted(ROOT.glob(pattern)):
+            if "node_modules" not in path.parts:
+                parts.append(path.read_text(encoding="utf-8", errors="ignore"))
+    return "\n\n".join(parts)
+
+def make_bodies(corpus: str, size: int, count: int):
+    step = max(1, (len(corpus) - size) // count)
+    return [corpus[start:start + size] for start in range(0, step * count, step)]
+
+def time_per_call_us(fn, values, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for value in values:
+            fn(value)
+    return (time.perf_counter() - started) / (repeat * len(values)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=int, default=2048, help="Compression threshold in bytes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 4096, 16384, 65536], help="Body sizes in characters")
+    parser.add_argument("--count", type=int, default=200, help="Bodies per size")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    codecs = ["zlib"] + (["zstd"] if ZSTD_AVAILABLE else [])
+    if not ZSTD_AVAILABLE:
+        print("zstandard is not installed, only zlib is measured\n")
+
+    print(f"Corpus: {len(corpus):,} characters, threshold {args.threshold} bytes\n")
+    header = f"{'size':>7} {'codec':>5} {'plain KB':>9} {'stored KB':>10} {'saved':>6} {'encode us':>10} {'read plain us':>14} {'read stored us':>15} {'added us':>9}"
+    print(header)
+    print("-" * len(header))
+
+    for size in args.sizes:
+        bodies = make_bodies(corpus, size, args.count)
+        plain_bytes = sum(len(body.encode("utf-8")) for body in bodies)
+        read_plain = time_per_call_us(decode_text, bodies, args.repeat)
+        for codec in codecs:
+            stored = [encode_text(body, args.threshold, codec) for body in bodies]
+            stored_bytes = sum(len(value.encode("utf-8")) for value in stored)
+            encode_us = time_per_call_us(lambda body: encode_text(body, args.threshold, codec), bodies, args.repeat)
+            read_stored = time_per_call_us(decode_text, stored, args.repeat)
+            saved = 1 - stored_bytes / plain_bytes
+            print(
+                f"{size:>7} {codec:>5} {plain_bytes / 1024:>9.1f} {stored_bytes / 1024:>10.1f} {saved:>6.0%} "
+                f"{encode_us:>10.1f} {read_plain:>14.2f} {read_stored:>15.1f} {read_stored - read_plain:>9.1f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Shared pytest setup: a throwaway SQLite database and the app under a
+TestClient, with the background Ollama probes and rate limiting
+switched off.
+"""
+
+import os
+import sys
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["HEALTH_PROBE_INTERVAL_SECONDS"] = "0"
+os.environ["OLLAMA_WARMUP"] = "False"
+# Every test client shares one address, whose anonymous bucket logins would drain
+os.environ["RATE_LIMIT_ENABLED"] = "False"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+def register(client, username):
+    """Create a user and return auth headers for it"""
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "full_name": username.title(),
+        "password": "secret"
+    })
+    response = client.post("/api/auth/token", data={"username": username, "password": "secret"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
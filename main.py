@@ -1,11 +1,19 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
 
 from app.database import engine, Base
 from app.routers import auth, chat, tools
 from app.config import settings
+from app.middleware.rate_limit import RateLimitMiddleware, proxy_platform, rate_limiter
+from app.services.admission import AdmissionRejected
+from app.services.ai_service import ai_service
+from app.services.auth_cache import auth_cache
+from app.services.chat_archiver import chat_archiver
+from app.services.chat_purger import chat_purger
+from app.services.password_hasher import password_hasher
 
 # Remove database creation from module level to avoid connection issues
 # Base.metadata.create_all(bind=engine)
@@ -17,18 +25,38 @@ async def lifespan(app: FastAPI):
     print(f"Database URL: {settings.DATABASE_URL[:20]}...")  # Print first 20 chars only
     print(f"AI Provider: {settings.AI_PROVIDER}")
     print(f"CORS Origins: {settings.ALLOWED_ORIGINS}")
+    platform = proxy_platform()
+    if platform and rate_limiter.enabled and not rate_limiter.trust_proxy_headers:
+        print(f"Warning: running behind the {platform} router without RATE_LIMIT_TRUST_PROXY_HEADERS, "
+              "all anonymous clients share one rate limit bucket")
     
-    try:
-        # Create database tables on startup
-        Base.metadata.create_all(bind=engine)
-        print("Database tables created successfully")
-    except Exception as e:
-        print(f"Warning: Could not create database tables: {e}")
-        print("App will continue without database...")
+    auto_create = settings.AUTO_CREATE_TABLES
+    if auto_create is None:
+        auto_create = engine.dialect.name == "sqlite"
+    if auto_create:
+        try:
+            # Local development shortcut, deployments apply migrations with `alembic upgrade head`
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            print("Database tables created successfully")
+        except Exception as e:
+            print(f"Warning: Could not create database tables: {e}")
+            print("App will continue without database...")
+    
+    await ai_service.startup()
+    chat_purger.start()
+    chat_archiver.start()
     
     yield
     # Shutdown
     print("Shutting down TAI Backend...")
+    await chat_archiver.stop()
+    await chat_purger.stop()
+    await ai_service.shutdown()
+    await auth_cache.close()
+    await rate_limiter.close()
+    password_hasher.shutdown()
+    await engine.dispose()
 
 app = FastAPI(
     title="TAI - Tanzania AI Developer Assistant",
@@ -37,6 +65,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rate limiting, inside CORS so 429s still carry CORS headers
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -44,8 +75,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Before-Cursor", "X-After-Cursor", "Retry-After"],
 )
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    # The AI providers are saturated, shed the request instead of queueing it
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
@@ -63,6 +104,26 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "providers": ai_service.provider_health(),
+        "http_pools": ai_service.pool_stats(),
+        "admission": ai_service.admission_stats(),
+        "concurrency_limits": ai_service.concurrency_stats(),
+        "ollama": ai_service.ollama_timings.stats(),
+        "cache": ai_service.cache.stats(),
+        "auth_cache": auth_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "chat_purger": chat_purger.stats(),
+        "chat_archiver": chat_archiver.stats(),
+        "coalescing": {
+            "requests": ai_service.inflight.stats(),
+            "streams": ai_service.inflight_streams.stats(),
+        },
+    }
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,67 @@
+import asyncio
+from logging.config import fileConfig
+
+from sqlalchemy.engine import Connection
+
+from alembic import context
+
+from app.database import Base, engine
+import app.models  # noqa: F401 - registers the tables on Base.metadata
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Tables managed outside the ORM models (full-text search, see app.models.SEARCH_INDEX_DDL)
+UNMANAGED_TABLE_PREFIXES = ("messages_fts", "message_search")
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and name.startswith(UNMANAGED_TABLE_PREFIXES):
+        return False
+    return True
+
+def _configure(**kwargs):
+    # SQLite can't alter constraints in place, batch mode rebuilds the table
+    context.configure(
+        target_metadata=target_metadata,
+        render_as_batch=engine.dialect.name == "sqlite",
+        include_object=include_object,
+        **kwargs
+    )
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL instead of running it (alembic upgrade --sql)"""
+    _configure(
+        url=engine.url.render_as_string(hide_password=False),
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def do_run_migrations(connection: Connection) -> None:
+    if connection.dialect.name == "sqlite":
+        # Rebuilding a table with foreign keys enforced would cascade through
+        # (or refuse to drop) its children, so migrations run with them off
+        connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        # End the implicit transaction so alembic's own one is the outermost and commits
+        connection.commit()
+    _configure(connection=connection)
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_async_migrations() -> None:
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+def run_migrations_online() -> None:
+    asyncio.run(run_async_migrations())
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
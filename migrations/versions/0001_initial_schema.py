@@ -0,0 +1,79 @@
+"""initial schema
+
+The tables as Base.metadata.create_all used to create them at startup.
+Databases that already have them are left alone, so existing deployments
+can run `alembic upgrade head` without stamping first.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Offline (--sql) runs can't inspect the database and emit the full schema
+    existing = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(), nullable=False),
+            sa.Column('username', sa.String(), nullable=False),
+            sa.Column('full_name', sa.String(), nullable=True),
+            sa.Column('hashed_password', sa.String(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_users_id', 'users', ['id'])
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    if 'chats' not in existing:
+        op.create_table(
+            'chats',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_chats_id', 'chats', ['id'])
+
+    if 'messages' not in existing:
+        op.create_table(
+            'messages',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('role', sa.String(), nullable=False),
+            sa.Column('chat_id', sa.Integer(), nullable=True),
+            sa.Column('programming_language', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['chat_id'], ['chats.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_messages_id', 'messages', ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('messages')
+    op.drop_table('chats')
+    op.drop_table('users')
@@ -0,0 +1,40 @@
+"""chat context summary
+
+Columns for the rolling conversation summary. create_all never added
+them to tables that already existed, so they may or may not be present.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = set() if context.is_offline_mode() else {
+        column['name'] for column in sa.inspect(op.get_bind()).get_columns('chats')
+    }
+    with op.batch_alter_table('chats') as batch_op:
+        if 'context_summary' not in columns:
+            batch_op.add_column(sa.Column('context_summary', sa.Text(), nullable=True))
+        if 'summary_message_id' not in columns:
+            batch_op.add_column(sa.Column('summary_message_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('chats') as batch_op:
+        batch_op.drop_column('summary_message_id')
+        batch_op.drop_column('context_summary')
@@ -0,0 +1,49 @@
+"""chat hot path indexes and cascading deletes
+
+- messages(chat_id, created_at) for loading a chat's history in order
+- chats(user_id, updated_at desc) for the chat list
+- ON DELETE CASCADE from users to chats and from chats to messages
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# PostgreSQL's default name for the foreign keys create_all made. SQLite
+# doesn't name them, batch mode reflects them under the same names instead.
+FOREIGN_KEY_NAME = '%(table_name)s_%(column_0_name)s_fkey'
+
+
+def _replace_foreign_key(table: str, column: str, referent: str, ondelete: Union[str, None]) -> None:
+    name = FOREIGN_KEY_NAME % {'table_name': table, 'column_0_name': column}
+    with op.batch_alter_table(table, naming_convention={'fk': FOREIGN_KEY_NAME}) as batch_op:
+        batch_op.drop_constraint(name, type_='foreignkey')
+        batch_op.create_foreign_key(name, referent, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_foreign_key('chats', 'user_id', 'users', 'CASCADE')
+    _replace_foreign_key('messages', 'chat_id', 'chats', 'CASCADE')
+    op.create_index('ix_messages_chat_id_created_at', 'messages', ['chat_id', 'created_at'])
+    op.create_index('ix_chats_user_id_updated_at', 'chats', ['user_id', sa.text('updated_at DESC')])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chats_user_id_updated_at', table_name='chats')
+    op.drop_index('ix_messages_chat_id_created_at', table_name='messages')
+    _replace_foreign_key('messages', 'chat_id', 'chats', None)
+    _replace_foreign_key('chats', 'user_id', 'users', None)
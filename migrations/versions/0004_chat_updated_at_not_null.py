@@ -0,0 +1,54 @@
+"""chat updated_at not null
+
+Chats were only given an updated_at on their first change, so new chats
+sorted as NULL. Keyset pagination orders by it; backfill from created_at
+and default it on insert from now on.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _rebuild_chat_list_index() -> None:
+    # SQLite's batch table rebuild reflects the index without its DESC
+    if context.get_context().dialect.name == 'sqlite':
+        op.drop_index('ix_chats_user_id_updated_at', table_name='chats')
+        op.create_index('ix_chats_user_id_updated_at', 'chats', ['user_id', sa.text('updated_at DESC')])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("UPDATE chats SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL")
+    with op.batch_alter_table('chats') as batch_op:
+        batch_op.alter_column(
+            'updated_at',
+            existing_type=sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        )
+    _rebuild_chat_list_index()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('chats') as batch_op:
+        batch_op.alter_column(
+            'updated_at',
+            existing_type=sa.DateTime(timezone=True),
+            server_default=None,
+            nullable=True,
+        )
+    _rebuild_chat_list_index()
@@ -0,0 +1,37 @@
+"""chat sidebar columns
+
+message_count, last_message_at and last_message_preview on chats, kept
+up to date when messages are written. Existing chats are filled in by
+`python -m app.cli backfill-chat-stats`, in batches, after upgrading.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chats', sa.Column('message_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('chats', sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('chats', sa.Column('last_message_preview', sa.String(length=120), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('chats') as batch_op:
+        batch_op.drop_column('last_message_preview')
+        batch_op.drop_column('last_message_at')
+        batch_op.drop_column('message_count')
@@ -0,0 +1,33 @@
+"""chat soft delete
+
+Deleted chats are stamped with deleted_at and purged in the background.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chats', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_chats_deleted_at', 'chats', ['deleted_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chats_deleted_at', table_name='chats')
+    with op.batch_alter_table('chats') as batch_op:
+        batch_op.drop_column('deleted_at')
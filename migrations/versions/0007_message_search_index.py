@@ -0,0 +1,64 @@
+"""message search index
+
+Full-text index over message content: an FTS5 table on SQLite
+(contentless where SQLite supports deleting from one, so it holds no
+second copy of every message), a tsvector table with a GIN index on
+PostgreSQL. Existing messages are
+indexed here; new ones are indexed by the application as they are
+written.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+
+# contentless_delete, needed for the delete trigger on a contentless table
+SQLITE_CONTENTLESS_DELETE = (3, 43, 0)
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = context.get_context().dialect.name
+    if dialect == 'sqlite':
+        version = context.get_context().dialect.server_version_info or (0,)
+        if version >= SQLITE_CONTENTLESS_DELETE:
+            op.execute("CREATE VIRTUAL TABLE messages_fts USING fts5(content, content='', contentless_delete=1)")
+        else:
+            op.execute("CREATE VIRTUAL TABLE messages_fts USING fts5(content)")
+        op.execute("INSERT INTO messages_fts (rowid, content) SELECT id, content FROM messages")
+        op.execute(
+            "CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages "
+            "BEGIN DELETE FROM messages_fts WHERE rowid = old.id; END"
+        )
+    elif dialect == 'postgresql':
+        op.execute(
+            "CREATE TABLE message_search ("
+            "message_id INTEGER PRIMARY KEY REFERENCES messages (id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        )
+        op.execute(
+            "INSERT INTO message_search (message_id, document) "
+            "SELECT id, to_tsvector('simple', content) FROM messages"
+        )
+        # Built after the bulk load, much faster than maintaining it row by row
+        op.execute("CREATE INDEX ix_message_search_document ON message_search USING GIN (document)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = context.get_context().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER messages_fts_delete")
+        op.execute("DROP TABLE messages_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP TABLE message_search")
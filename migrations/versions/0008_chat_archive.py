@@ -0,0 +1,113 @@
+"""chat archive
+
+Messages of idle chats move into chat_archives, one compressed document
+per chat, and come back when the chat is opened. Their search index
+entries (migration 0007) stay, pointed at the archive through
+archived_messages, and go when the archive does.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chats', sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('chats', sa.Column('restored_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_table(
+        'chat_archives',
+        sa.Column('chat_id', sa.Integer(), nullable=False),
+        sa.Column('codec', sa.String(), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('message_count', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['chat_id'], ['chats.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('chat_id'),
+    )
+    op.create_table(
+        'archived_messages',
+        sa.Column('message_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('chat_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['chat_id'], ['chat_archives.chat_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('message_id'),
+    )
+    op.create_index(op.f('ix_archived_messages_chat_id'), 'archived_messages', ['chat_id'], unique=False)
+
+    # Deleting an archived message keeps its search entry, deleting its
+    # archived_messages row drops it
+    dialect = context.get_context().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER messages_fts_delete")
+        op.execute(
+            "CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages "
+            "WHEN NOT EXISTS (SELECT 1 FROM archived_messages WHERE message_id = old.id) "
+            "BEGIN DELETE FROM messages_fts WHERE rowid = old.id; END"
+        )
+        op.execute(
+            "CREATE TRIGGER archived_messages_fts_delete AFTER DELETE ON archived_messages "
+            "BEGIN DELETE FROM messages_fts WHERE rowid = old.message_id; END"
+        )
+    elif dialect == 'postgresql':
+        op.execute("ALTER TABLE message_search DROP CONSTRAINT message_search_message_id_fkey")
+        op.execute(
+            "CREATE FUNCTION message_search_forget_message() RETURNS trigger LANGUAGE plpgsql AS $$ "
+            "BEGIN "
+            "DELETE FROM message_search WHERE message_id = OLD.id "
+            "AND NOT EXISTS (SELECT 1 FROM archived_messages WHERE message_id = OLD.id); "
+            "RETURN NULL; "
+            "END $$"
+        )
+        op.execute(
+            "CREATE FUNCTION message_search_forget_archived() RETURNS trigger LANGUAGE plpgsql AS $$ "
+            "BEGIN DELETE FROM message_search WHERE message_id = OLD.message_id; RETURN NULL; END $$"
+        )
+        op.execute(
+            "CREATE TRIGGER message_search_delete AFTER DELETE ON messages "
+            "FOR EACH ROW EXECUTE FUNCTION message_search_forget_message()"
+        )
+        op.execute(
+            "CREATE TRIGGER message_search_delete AFTER DELETE ON archived_messages "
+            "FOR EACH ROW EXECUTE FUNCTION message_search_forget_archived()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema. Archived messages are lost: reopen those chats first."""
+    dialect = context.get_context().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER archived_messages_fts_delete")
+        op.execute("DELETE FROM messages_fts WHERE rowid IN (SELECT message_id FROM archived_messages)")
+        op.execute("DROP TRIGGER messages_fts_delete")
+        op.execute(
+            "CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages "
+            "BEGIN DELETE FROM messages_fts WHERE rowid = old.id; END"
+        )
+    elif dialect == 'postgresql':
+        op.execute("DROP TRIGGER message_search_delete ON archived_messages")
+        op.execute("DROP TRIGGER message_search_delete ON messages")
+        op.execute("DROP FUNCTION message_search_forget_archived()")
+        op.execute("DROP FUNCTION message_search_forget_message()")
+        op.execute("DELETE FROM message_search WHERE message_id NOT IN (SELECT id FROM messages)")
+        op.execute(
+            "ALTER TABLE message_search ADD CONSTRAINT message_search_message_id_fkey "
+            "FOREIGN KEY (message_id) REFERENCES messages (id) ON DELETE CASCADE"
+        )
+    op.drop_index(op.f('ix_archived_messages_chat_id'), table_name='archived_messages')
+    op.drop_table('archived_messages')
+    op.drop_table('chat_archives')
+    with op.batch_alter_table('chats') as batch_op:
+        batch_op.drop_column('restored_at')
+        batch_op.drop_column('archived_at')
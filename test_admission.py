@@ -0,0 +1,32 @@
+"""
+Calls shed by admission control surface as 503 with Retry-After on
+every AI route, instead of being swallowed by the routes' error handling.
+Run with: python -m pytest test_admission.py
+"""
+
+import pytest
+
+from app.services.ai_service import ai_service
+from conftest import register
+
+@pytest.fixture(scope="module")
+def headers(client):
+    return register(client, "admission")
+
+@pytest.fixture
+def saturated(monkeypatch):
+    # Every slot taken and no room to queue: the next call is rejected at once
+    for controller in ai_service.admission.values():
+        monkeypatch.setattr(controller, "in_flight", controller.limit)
+        monkeypatch.setattr(controller, "max_queue", 0)
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/tools/generate-code", {"description": "parse a date", "programming_language": "python"}),
+    ("/api/tools/debug", {"code": "print(x)", "error_message": "NameError", "programming_language": "python"}),
+    ("/api/tools/api-helper", {"description": "todo list", "programming_language": "python"}),
+    ("/api/tools/cli-help", {"command_description": "undo the last commit", "tool": "git"}),
+])
+def test_rejected_tools_call_returns_503(client, headers, saturated, path, body):
+    response = client.post(path, json=body, headers=headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
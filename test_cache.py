@@ -0,0 +1,45 @@
+"""
+Response cache and request coalescing keys: prompts that mean different
+things must never share a key. Structured tools answers are only cached
+once they parse.
+Run with: python -m pytest test_cache.py
+"""
+
+import json
+
+import pytest
+
+from app.routers.tools import _generate_structured
+from app.services.ai_service import ai_service
+
+NESTED = "def total(items):\n    for item in items:\n        if item:\n            count += 1\n    return count\n"
+FLAT = "def total(items):\n    for item in items:\n        if item:\n            count += 1\n        return count\n"
+
+def fingerprint(code):
+    return ai_service._fingerprint([{"role": "user", "content": f"Debug this code:\n{code}"}])
+
+def test_indentation_changes_the_key():
+    assert fingerprint(NESTED) != fingerprint(FLAT)
+
+def test_line_breaks_change_the_key():
+    assert fingerprint("a = 1\nb = 2") != fingerprint("a = 1 b = 2")
+
+def test_line_endings_and_outer_whitespace_share_a_key():
+    assert fingerprint(NESTED) == fingerprint(NESTED.replace("\n", "\r\n") + "  \n")
+
+@pytest.mark.parametrize("answer, cached", [
+    ("The code looks fine to me.", False),
+    (json.dumps({"generated_code": "print(1)", "explanation": "Prints 1"}), True),
+])
+def test_structured_answer_cached_only_when_parsed(client, monkeypatch, answer, cached):
+    calls = []
+
+    async def generate(messages, user_message, programming_language=None, priority=None):
+        calls.append(user_message)
+        return answer
+    monkeypatch.setattr(ai_service, "_generate_uncached", generate)
+
+    fields = {"generated_code": "the code", "explanation": f"what it does ({answer})"}
+    for _ in range(2):
+        client.portal.call(_generate_structured, "Generate python code", fields, "python")
+    assert len(calls) == (1 if cached else 2)
@@ -0,0 +1,51 @@
+"""
+Chat import: exports from any backend load, malformed ones are refused
+with 400 rather than failing in the database.
+Run with: python -m pytest test_chat_export.py
+"""
+
+import json
+
+import pytest
+
+from conftest import register
+
+HEADER = {"type": "export", "format": "tai-chats", "version": 1, "exported_at": "2024-05-01T10:00:00+00:00"}
+
+def body(*documents):
+    return "".join(json.dumps(document) + "\n" for document in (HEADER,) + documents)
+
+def message(**fields):
+    return {"type": "message", "chat": 1, "role": "user", "content": "hello",
+            "programming_language": None, "created_at": None, **fields}
+
+@pytest.fixture(scope="module")
+def headers(client):
+    return register(client, "exporter")
+
+def test_import_mixes_offset_and_naive_timestamps(client, headers):
+    response = client.post("/api/chat/import", headers=headers, content=body(
+        {"type": "chat", "id": 1, "title": "From PostgreSQL", "created_at": "2024-05-01T09:00:00+03:00"},
+        message(created_at="2024-05-01T09:00:00+03:00"),
+        message(role="assistant", content="hi", created_at="2024-05-01T06:30:00"),
+        message(content="again"),
+    ))
+    assert response.status_code == 200
+    assert response.json() == {"chats": 1, "messages": 3}
+
+    chat = next(chat for chat in client.get("/api/chat/", headers=headers).json() if chat["title"] == "From PostgreSQL")
+    # +03:00 stored as naive UTC
+    assert chat["created_at"].startswith("2024-05-01T06:00:00")
+
+@pytest.mark.parametrize("document", [
+    message(programming_language=["python"]),
+    message(role=1),
+    message(content={"text": "hello"}),
+    message(chat=[1]),
+    {"type": "chat", "id": 1, "title": 42},
+])
+def test_import_rejects_wrongly_typed_fields(client, headers, document):
+    documents = (document,) if document["type"] == "chat" else ({"type": "chat", "id": 1, "title": "Bad"}, document)
+    response = client.post("/api/chat/import", headers=headers, content=body(*documents))
+    assert response.status_code == 400
+    assert "invalid" in response.json()["detail"]
@@ -0,0 +1,54 @@
+"""
+Rolling chat summaries: every message is either in the summary or still
+sent as a turn, however long the unsummarized backlog.
+Run with: python -m pytest test_conversation.py
+"""
+
+import pytest
+
+from app.database import AsyncSessionLocal
+from app.models import Chat, Message
+from app.services import conversation
+from app.services.ai_service import ai_service
+from conftest import register
+
+@pytest.fixture(scope="module")
+def headers(client):
+    return register(client, "summarized")
+
+def test_summary_folds_backlog_longer_than_one_window(client, headers, monkeypatch):
+    chat_id = client.post("/api/chat/", json={"title": "Long history"}, headers=headers).json()["id"]
+    count = conversation.MAX_UNSUMMARIZED_MESSAGES * 2 + 50
+    contents = [f"turn {index} about keyset pagination" for index in range(count)]
+
+    async def insert():
+        async with AsyncSessionLocal() as db:
+            db.add_all(
+                Message(chat_id=chat_id, role="user" if index % 2 == 0 else "assistant", content=content)
+                for index, content in enumerate(contents)
+            )
+            await db.commit()
+    client.portal.call(insert)
+
+    folded = []
+    async def summarize(previous_summary, turns):
+        folded.extend(turn["content"] for turn in turns)
+        return f"summary of {len(folded)} turns"
+    monkeypatch.setattr(ai_service, "summarize_conversation", summarize)
+    # Small enough that the whole chat can't be sent, big enough for many turns per pass
+    monkeypatch.setattr(ai_service, "context_token_budget", 600)
+
+    client.portal.call(conversation.refresh_chat_summary, chat_id)
+
+    # Folded oldest first, with no gaps
+    assert folded == contents[:len(folded)]
+
+    async def remaining():
+        async with AsyncSessionLocal() as db:
+            chat = await db.get(Chat, chat_id)
+            return chat.context_summary, await conversation._unsummarized_messages(db, chat)
+    summary, messages = client.portal.call(remaining)
+    assert summary == f"summary of {len(folded)} turns"
+    # What isn't summarized follows right after and is loaded whole
+    assert [message.content for message in messages] == contents[len(folded):]
+    assert not ai_service.context_builder().turns_to_fold([{"role": m.role, "content": m.content} for m in messages])
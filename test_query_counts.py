@@ -0,0 +1,66 @@
+"""
+Pin the number of SQL statements the chat read endpoints execute, so
+loading stays explicit and doesn't grow with the amount of data.
+Run with: python -m pytest test_query_counts.py
+"""
+
+import pytest
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal, engine
+from app.models import Message, User
+from app.utils.query_counter import assert_query_count
+from conftest import register
+
+@pytest.fixture(scope="module")
+def headers(client):
+    return register(client, "queries")
+
+def add_messages(client, chat_id, count):
+    async def insert():
+        async with AsyncSessionLocal() as db:
+            db.add_all(
+                Message(content=f"message {index}", role="user" if index % 2 == 0 else "assistant", chat_id=chat_id)
+                for index in range(count)
+            )
+            await db.commit()
+    client.portal.call(insert)
+
+@pytest.mark.parametrize("messages", [1, 120])
+def test_chat_read_endpoints_query_count(client, headers, messages):
+    chat_id = client.post("/api/chat/", json={"title": f"{messages} messages"}, headers=headers).json()["id"]
+    add_messages(client, chat_id, messages)
+
+    # chats page (the user comes from the auth cache)
+    with assert_query_count(engine, 1):
+        assert client.get("/api/chat/", headers=headers).status_code == 200
+
+    # chat + latest message page
+    with assert_query_count(engine, 2):
+        assert client.get(f"/api/chat/{chat_id}", headers=headers).status_code == 200
+
+    # ownership check + message page
+    with assert_query_count(engine, 2):
+        response = client.get(f"/api/chat/{chat_id}/messages", headers=headers)
+        assert response.status_code == 200
+
+    cursor = response.headers.get("X-Before-Cursor")
+    if cursor:
+        with assert_query_count(engine, 2):
+            assert client.get(f"/api/chat/{chat_id}/messages", params={"before": cursor}, headers=headers).status_code == 200
+
+def test_cached_user_skips_database_until_deactivated(client):
+    headers = register(client, "cached")
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    with assert_query_count(engine, 0):
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    async def deactivate():
+        async with AsyncSessionLocal() as db:
+            user = (await db.execute(select(User).where(User.username == "cached"))).scalars().one()
+            user.is_active = False
+            await db.commit()
+    client.portal.call(deactivate)
+
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
@@ -0,0 +1,94 @@
+"""
+Message search: archived chats stay searchable, and their index entries
+go when the archive is restored or purged. Scores aren't rounded away
+and databases without a search index answer 501.
+Run with: python -m pytest test_search.py
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select, text
+
+from app.database import AsyncSessionLocal
+from app.models import Chat
+from app.services.chat_archiver import archive_chat
+from app.services.chat_purger import chat_purger
+from app.services.search import SearchUnavailable, search_messages
+from conftest import register
+
+@pytest.fixture(scope="module")
+def headers(client):
+    return register(client, "searcher")
+
+def import_chat(client, headers, title, *contents):
+    documents = [
+        {"type": "export", "format": "tai-chats", "version": 1, "exported_at": "2024-05-01T10:00:00+00:00"},
+        {"type": "chat", "id": 1, "title": title, "created_at": "2024-05-01T09:00:00+00:00"},
+    ] + [
+        {"type": "message", "chat": 1, "role": "user", "content": content,
+         "programming_language": None, "created_at": "2024-05-01T09:00:00+00:00"}
+        for content in contents
+    ]
+    response = client.post("/api/chat/import", headers=headers, content="".join(json.dumps(d) + "\n" for d in documents))
+    assert response.status_code == 200
+    chat = next(chat for chat in client.get("/api/chat/", headers=headers).json() if chat["title"] == title)
+    return chat["id"]
+
+def archive(client, chat_id):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            moved = await archive_chat(db, chat_id)
+            await db.commit()
+            return moved
+    return client.portal.call(run)
+
+def search(client, headers, query):
+    response = client.get("/api/chat/search", headers=headers, params={"q": query})
+    assert response.status_code == 200
+    return response.json()["results"]
+
+def index_size(client, query):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                text("SELECT count(*) FROM messages_fts WHERE messages_fts MATCH :query"), {"query": query}
+            )
+            return result.scalar()
+    return client.portal.call(run)
+
+def test_archived_chat_stays_searchable(client, headers):
+    chat_id = import_chat(client, headers, "Archived search", "kilimanjaro trek plans", "unrelated words")
+    assert archive(client, chat_id) == 2
+
+    hits = search(client, headers, "kilimanjaro")
+    assert [(hit["chat_id"], hit["chat_title"], hit["role"]) for hit in hits] == [(chat_id, "Archived search", "user")]
+    assert "<mark>kilimanjaro</mark>" in hits[0]["snippet"]
+    assert hits[0]["created_at"].startswith("2024-05-01T09:00:00")
+    # bm25 on a handful of rows is around 1e-6, which 4 decimals showed as 0.0
+    assert hits[0]["score"] > 0
+
+    # Opening restores the chat; the hit now comes from the hot table, once
+    assert client.get(f"/api/chat/{chat_id}", headers=headers).status_code == 200
+    assert [hit["message_id"] for hit in search(client, headers, "kilimanjaro")] == [hits[0]["message_id"]]
+
+def test_purged_archived_chat_leaves_no_index_entries(client, headers):
+    chat_id = import_chat(client, headers, "Purged search", "serengeti migration notes")
+    archive(client, chat_id)
+    assert index_size(client, "serengeti") == 1
+
+    assert client.delete(f"/api/chat/{chat_id}", headers=headers).status_code == 200
+    assert search(client, headers, "serengeti") == []
+    client.portal.call(chat_purger.purge_once)
+
+    async def gone():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(Chat.id).where(Chat.id == chat_id))).first() is None
+    assert client.portal.call(gone)
+    assert index_size(client, "serengeti") == 0
+
+def test_database_without_search_index_is_refused(client):
+    db = SimpleNamespace(bind=SimpleNamespace(dialect=SimpleNamespace(name="mysql")))
+    with pytest.raises(SearchUnavailable):
+        client.portal.call(search_messages, db, 1, "anything", 20)
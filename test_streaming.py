@@ -0,0 +1,110 @@
+"""
+Streaming chat replies when the client goes away mid-answer: the upstream
+generation stops and the text produced so far is saved.
+Run with: python -m pytest test_streaming.py
+"""
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+import main
+from app.database import AsyncSessionLocal
+from app.models import Message
+from app.routers import chat as chat_router
+from app.services.ai_service import ai_service
+from conftest import register
+
+@pytest.fixture(scope="module")
+def headers(client):
+    return register(client, "streamer")
+
+@pytest.fixture
+def slow_provider(monkeypatch):
+    """Ollama stand-in producing 50 tokens slowly; records where it stopped"""
+    stopped_at = []
+
+    async def stream(messages):
+        index = 0
+        try:
+            for index in range(50):
+                await asyncio.sleep(0.01)
+                yield f"part{index} "
+        finally:
+            stopped_at.append(index)
+
+    monkeypatch.setattr(ai_service, "_stream_with_ollama", stream)
+    monkeypatch.setattr(ai_service, "_provider_chain", lambda: ["ollama"])
+    monkeypatch.setattr(ai_service.breakers["ollama"], "allow_request", lambda: True)
+    return stopped_at
+
+async def post_then_disconnect(path, headers, payload, after_tokens):
+    """Drive the app like a server would, with the client leaving after `after_tokens` tokens"""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"authorization", headers["Authorization"].encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    requested = False
+    tokens = []
+    gone = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and b'"token"' in message.get("body", b""):
+            tokens.append(message["body"])
+            if len(tokens) >= after_tokens:
+                gone.set()
+
+    await main.app(scope, receive, send)
+    await asyncio.gather(*chat_router._detached_tasks)
+    for _ in range(100):
+        if not ai_service.inflight_streams.stats()["in_flight"]:
+            break
+        await asyncio.sleep(0.01)
+    return tokens
+
+def test_disconnect_mid_stream_stops_generation_and_saves_partial_answer(client, headers, slow_provider):
+    chat_id = client.post("/api/chat/", json={"title": "Disconnect"}, headers=headers).json()["id"]
+
+    client.portal.call(
+        post_then_disconnect, f"/api/chat/{chat_id}/messages/stream", headers, {"content": "explain cursors"}, 2
+    )
+
+    # Upstream was cancelled well before its 50 tokens, and gave its slot back
+    assert slow_provider and slow_provider[0] < 49
+    assert ai_service.admission["ollama"].in_flight == 0
+
+    async def messages():
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Message).where(Message.chat_id == chat_id).order_by(Message.id))
+            return [(message.role, message.content) for message in result.scalars()]
+    saved = client.portal.call(messages)
+    assert saved[0] == ("user", "explain cursors")
+    role, content = saved[1]
+    assert role == "assistant"
+    assert content.startswith("part0 part1 ")
+    assert len(saved) == 2 and "part49" not in content